@@ -5,6 +5,7 @@ from sqlalchemy import pool
 from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
+from src.chat.partitions import is_partition_name
 from src.core.config import settings
 from src.models import *
 
@@ -54,10 +55,15 @@ def run_migrations_offline() -> None:
     with context.begin_transaction():
         context.run_migrations()
 
+def include_name(name, type_, parent_names):
+    # chat_messages partitions come and go at runtime (src/chat/partitions.py).
+    return not (type_ == "table" and is_partition_name(name))
+
 def do_run_migrations(connection):
     context.configure(
         connection=connection,
-        target_metadata=target_metadata
+        target_metadata=target_metadata,
+        include_name=include_name
     )
     with context.begin_transaction():
         context.run_migrations()
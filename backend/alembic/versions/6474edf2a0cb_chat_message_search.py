@@ -0,0 +1,54 @@
+"""chat message search
+
+Revision ID: 6474edf2a0cb
+Revises: 83d7567cec26
+Create Date: 2026-10-18 02:50:30.434532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6474edf2a0cb'
+down_revision: Union[str, Sequence[str], None] = '83d7567cec26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_CONFIG = 'chat_search'
+SEARCH_DOCUMENT = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, COALESCE(content, ''::text))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "simple" keeps every word (no stemming or stop words suit Vietnamese);
+    # unaccent folds tones and marks so "hop dong" finds "hợp đồng". The
+    # extension is required: without it the upgrade fails.
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute(f'CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = simple)')
+    op.execute(
+        f'ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} '
+        'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple'
+    )
+    op.add_column(
+        'chat_messages',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_DOCUMENT, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(op.f('chat_messages_search_vector_idx'), 'chat_messages', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('chat_messages_search_vector_idx'), table_name='chat_messages', postgresql_using='gin')
+    op.drop_column('chat_messages', 'search_vector')
+    # The unaccent extension stays; other objects may use it.
+    op.execute(f'DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}')
@@ -0,0 +1,97 @@
+"""chat message partitions
+
+Revision ID: 83d7567cec26
+Revises: 6a1679fb372a
+Create Date: 2026-10-18 02:45:53.479860
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '83d7567cec26'
+down_revision: Union[str, Sequence[str], None] = '6a1679fb372a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Months created ahead by the migration; afterwards the app and the arq cron
+# job keep CHAT_MESSAGE_PARTITIONS_AHEAD months ready.
+PARTITIONS_AHEAD = 3
+
+INDEXES = (
+    ('chat_messages_id_idx', ['id']),
+    ('chat_messages_conversation_id_idx', ['conversation_id']),
+    ('chat_messages_sender_id_idx', ['sender_id']),
+    ('chat_messages_change_seq_idx', ['change_seq']),
+)
+HISTORY_INDEX = 'chat_messages_conversation_id_create_at_id_idx'
+
+
+def _move_aside(suffix: str) -> str:
+    """Rename chat_messages and its indexes out of the way; returns the new table name."""
+    moved = f'chat_messages_{suffix}'
+    op.rename_table('chat_messages', moved)
+    for name in ['chat_messages_pkey', HISTORY_INDEX, *(name for name, _ in INDEXES)]:
+        op.execute(f'ALTER INDEX {name} RENAME TO {name.replace("chat_messages_", f"{moved}_", 1)}')
+    return moved
+
+
+def _create_keys_and_indexes(primary_key: list[str]) -> None:
+    op.create_primary_key(op.f('chat_messages_pkey'), 'chat_messages', primary_key)
+    op.create_foreign_key(op.f('chat_messages_conversation_id_fkey'), 'chat_messages', 'chat_conversations', ['conversation_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key(op.f('chat_messages_sender_id_fkey'), 'chat_messages', 'user', ['sender_id'], ['id'], ondelete='CASCADE')
+    for name, columns in INDEXES:
+        op.create_index(op.f(name), 'chat_messages', columns, unique=False)
+    op.create_index(HISTORY_INDEX, 'chat_messages', ['conversation_id', sa.text('create_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Month boundaries are UTC whatever the server's time zone.
+    op.execute("SET LOCAL TimeZone = 'UTC'")
+    moved = _move_aside('unpartitioned')
+    # create_at becomes part of the primary key.
+    op.execute(f'UPDATE {moved} SET create_at = COALESCE(updated_at, now()) WHERE create_at IS NULL')
+
+    op.execute(f'CREATE TABLE chat_messages (LIKE {moved} INCLUDING DEFAULTS) PARTITION BY RANGE (create_at)')
+    # One partition per month from the oldest message to PARTITIONS_AHEAD months out.
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamptz;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', LEAST(now(), (SELECT min(create_at) FROM {moved}))),
+                    date_trunc('month', GREATEST(now() + interval '{PARTITIONS_AHEAD} months', (SELECT max(create_at) FROM {moved}))),
+                    interval '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF chat_messages FOR VALUES FROM (%L) TO (%L)',
+                    'chat_messages_y' || to_char(month, 'YYYY"m"MM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute(f'INSERT INTO chat_messages SELECT * FROM {moved}')
+    op.drop_table(moved)
+    _create_keys_and_indexes(['create_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived months stay in their files; detached tables are left alone.
+    moved = _move_aside('partitioned')
+    op.execute(f'CREATE TABLE chat_messages (LIKE {moved} INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO chat_messages SELECT * FROM {moved}')
+    op.drop_table(moved)
+    _create_keys_and_indexes(['id'])
@@ -0,0 +1,64 @@
+"""chat message default partition
+
+Revision ID: b899557a3295
+Revises: 6474edf2a0cb
+Create Date: 2026-10-18 03:20:41.618204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b899557a3295'
+down_revision: Union[str, Sequence[str], None] = '6474edf2a0cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEFAULT_PARTITION = 'chat_messages_default'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Takes rows past the last monthly partition instead of failing the insert;
+    # the partition maintenance job moves them into their month.
+    op.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF chat_messages DEFAULT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rows in the default partition get monthly partitions of their own.
+    op.execute("SET LOCAL TimeZone = 'UTC'")
+    op.execute(f'ALTER TABLE chat_messages DETACH PARTITION {DEFAULT_PARTITION}')
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamptz;
+            stored_columns text;
+        BEGIN
+            FOR month IN SELECT DISTINCT date_trunc('month', create_at) FROM {DEFAULT_PARTITION}
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF chat_messages FOR VALUES FROM (%L) TO (%L)',
+                    'chat_messages_y' || to_char(month, 'YYYY"m"MM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+            -- Generated columns are recomputed on insert.
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+            INTO stored_columns
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = '{DEFAULT_PARTITION}' AND is_generated = 'NEVER';
+            EXECUTE format(
+                'INSERT INTO chat_messages (%s) SELECT %s FROM {DEFAULT_PARTITION}',
+                stored_columns,
+                stored_columns
+            );
+        END $$
+        """
+    )
+    op.drop_table(DEFAULT_PARTITION)
@@ -0,0 +1,99 @@
+"""Benchmark the chat banned-term matcher against one regex per term.
+
+Generates ``--patterns`` random Vietnamese-looking terms (1k and 10k by
+default), builds ``TermMatcher`` over them and times ``find`` on messages of
+``--lengths`` characters, half of them with a planted term. The old approach,
+one word-bounded regex per term, is timed on the same messages and used as
+the reference answer. No server or database is needed.
+
+Usage (from ``backend/``)::
+
+    uv run python -m scripts.bench_chat_moderation
+    uv run python -m scripts.bench_chat_moderation --patterns 1000 10000 50000 --lengths 200 4000
+
+Exits with status 1 when the matcher and the regexes disagree.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from src.chat.moderation import TermMatcher, normalize_text
+
+ONSETS = ("", "b", "c", "ch", "d", "đ", "g", "gi", "h", "k", "kh", "l", "m", "n", "ng", "nh", "ph", "qu", "s", "t", "th", "tr", "v", "x")
+VOWELS = ("a", "ă", "â", "e", "ê", "i", "o", "ô", "ơ", "u", "ư", "y", "ai", "ao", "oa", "uô", "ươ", "iê")
+CODAS = ("", "c", "ch", "m", "n", "ng", "nh", "p", "t")
+TONES = ("", "̀", "́", "̃", "̉", "̣")
+
+
+def _syllable(rng: random.Random) -> str:
+    vowel = rng.choice(VOWELS)
+    return rng.choice(ONSETS) + vowel[0] + rng.choice(TONES) + vowel[1:] + rng.choice(CODAS)
+
+
+def _terms(rng: random.Random, count: int) -> list[str]:
+    terms: set[str] = set()
+    while len(terms) < count:
+        terms.add(" ".join(_syllable(rng) for _ in range(rng.randint(2, 3))))
+    return sorted(terms)
+
+
+def _messages(rng: random.Random, terms: list[str], length: int, count: int) -> list[str]:
+    messages = []
+    for index in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(_syllable(rng))
+        if index % 2:
+            words.insert(rng.randrange(len(words)), rng.choice(terms).upper())
+        messages.append(" ".join(words)[:length + 40])
+    return messages
+
+
+def _time(function, messages: list[str]) -> tuple[list[bool], float]:
+    started = time.perf_counter()
+    hits = [function(message) for message in messages]
+    return hits, (time.perf_counter() - started) / len(messages) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patterns", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 4000])
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for count in args.patterns:
+        terms = _terms(rng, count)
+        started = time.perf_counter()
+        matcher = TermMatcher(terms)
+        build = time.perf_counter() - started
+        regexes = [re.compile(rf"(?<![^\W_]){re.escape(normalize_text(term))}(?![^\W_])") for term in terms]
+
+        def _per_term(message: str) -> bool:
+            text = normalize_text(message)
+            return any(regex.search(text) for regex in regexes)
+
+        print(f"patterns={count:<6} build={build * 1000:.0f}ms")
+        for length in args.lengths:
+            messages = _messages(rng, terms, length, args.messages)
+            found, matcher_micros = _time(lambda message: matcher.find(message) is not None, messages)
+            expected, regex_micros = _time(_per_term, messages)
+            wrong = sum(a != b for a, b in zip(found, expected))
+            mismatches += wrong
+            print(
+                f"  length={length:<5} hits={sum(found):<4} automaton={matcher_micros:>9.1f}µs/msg "
+                f"per-term regex={regex_micros:>10.1f}µs/msg {'✅' if not wrong else f'❌ {wrong} mismatches'}"
+            )
+
+    if mismatches:
+        print("❌ The matcher disagrees with the per-term regexes.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
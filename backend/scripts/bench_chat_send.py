@@ -0,0 +1,88 @@
+"""Measure chat message sends per second through the REST API.
+
+Posts ``--messages`` messages to one conversation between two existing users,
+``--concurrency`` requests at a time, against a running server (use a single
+worker to measure one process). The sender's per-user chat rate limit applies
+to these requests too, so start the server with a high
+``CHAT_RATE_LIMIT_MAX_EVENTS`` for the run.
+
+Usage (from ``backend/``, with the API already running)::
+
+    CHAT_RATE_LIMIT_MAX_EVENTS=1000000 uv run uvicorn src.main:app --workers 1
+    uv run python -m scripts.bench_chat_send --email demo_client@example.com --recipient-email demo_lawyer@example.com
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from sqlalchemy import select
+
+from src.auth.services import create_access_token
+from src.core.database import SessionLocal
+from src.user.models import User
+
+
+async def _recipient_id(email: str) -> str:
+    async with SessionLocal() as session:
+        result = await session.execute(select(User.id).where(User.email == email.lower()))
+        user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise SystemExit(f"No user with email {email!r}.")
+    return str(user_id)
+
+
+async def _run(base_url: str, email: str, recipient_email: str, messages: int, concurrency: int) -> int:
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': email})}"}
+    recipient_id = await _recipient_id(recipient_email)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        response = await client.post("/chat/conversations", json={"recipient_id": recipient_id})
+        response.raise_for_status()
+        path = f"/chat/conversations/{response.json()['id']}/messages"
+
+        latencies: list[float] = []
+        failures = 0
+        remaining = iter(range(messages))
+
+        async def _sender() -> None:
+            nonlocal failures
+            for index in remaining:
+                started = time.perf_counter()
+                response = await client.post(path, json={"content": f"bench {index}"})
+                latencies.append(time.perf_counter() - started)
+                if not response.is_success:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_sender() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"sent {messages} messages with concurrency {concurrency} in {elapsed:.2f}s")
+    print(f"throughput: {messages / elapsed:.1f} sends/s")
+    print(
+        f"latency: p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms"
+    )
+    if failures:
+        print(f"❌ {failures} sends failed.")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="Sender.")
+    parser.add_argument("--recipient-email", required=True)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.url, args.email, args.recipient_email, args.messages, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Compare chat WebSocket delivery with and without the ``batch`` capability.
+
+Opens ``--sockets`` sockets as the recipient, once plain and once with
+``?capabilities=batch``, then has the sender fire ``--events`` typing events
+into their conversation as fast as it can. Reports the frames each receiver
+got, events per frame and, with ``--server-pid`` (Linux), the server CPU time
+spent per delivered event.
+
+Usage (from ``backend/``, with the API already running)::
+
+    uv run python -m scripts.bench_ws_batching --email demo_client@example.com --recipient-email demo_lawyer@example.com
+    uv run python -m scripts.bench_ws_batching --email ... --recipient-email ... --sockets 100 --server-pid $(pgrep -f "uvicorn src.main")
+
+Exits with status 1 when a receiver misses events.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import websockets
+from sqlalchemy import select
+
+from src.auth.services import create_access_token
+from src.core.database import SessionLocal
+from src.user.models import User
+
+
+async def _recipient_id(email: str) -> str:
+    async with SessionLocal() as session:
+        result = await session.execute(select(User.id).where(User.email == email.lower()))
+        user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise SystemExit(f"No user with email {email!r}.")
+    return str(user_id)
+
+
+def _server_cpu_seconds(pid: int | None) -> float | None:
+    if pid is None:
+        return None
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the whole line.
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _receive(websocket, expected: int, timeout: float) -> tuple[int, int]:
+    frames = events = 0
+    deadline = time.monotonic() + timeout
+    while events < expected:
+        try:
+            raw = await asyncio.wait_for(websocket.recv(), max(deadline - time.monotonic(), 0.01))
+        except asyncio.TimeoutError:
+            break
+        frames += 1
+        payload = json.loads(raw)
+        for item in payload if isinstance(payload, list) else [payload]:
+            events += item.get("type") == "typing"
+    return frames, events
+
+
+async def _drain(websocket) -> None:
+    try:
+        async for _ in websocket:
+            pass
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def _run_mode(ws_url: str,
+                    sender_token: str,
+                    recipient_token: str,
+                    conversation_id: str,
+                    sockets: int,
+                    events: int,
+                    batch: bool,
+                    server_pid: int | None
+                    ) -> bool:
+    suffix = "&capabilities=batch" if batch else ""
+    receivers = await asyncio.gather(
+        *(websockets.connect(f"{ws_url}?token={recipient_token}{suffix}", ping_interval=None) for _ in range(sockets))
+    )
+    sender = await websockets.connect(f"{ws_url}?token={sender_token}", ping_interval=None)
+    drain = asyncio.create_task(_drain(sender))
+    # Let presence traffic from the connects settle first.
+    await asyncio.sleep(2)
+
+    cpu_before = _server_cpu_seconds(server_pid)
+    started = time.perf_counter()
+    receiving = [asyncio.create_task(_receive(receiver, events, timeout=60)) for receiver in receivers]
+    frame = json.dumps({"type": "typing", "conversation_id": conversation_id, "is_typing": True})
+    for _ in range(events):
+        await sender.send(frame)
+    results = await asyncio.gather(*receiving)
+    elapsed = time.perf_counter() - started
+    cpu_after = _server_cpu_seconds(server_pid)
+
+    await asyncio.gather(*(receiver.close() for receiver in receivers), sender.close())
+    drain.cancel()
+
+    frames = sum(result[0] for result in results)
+    delivered = sum(result[1] for result in results)
+    line = (
+        f"{'batch' if batch else 'plain':<5} delivered={delivered:<7} frames={frames:<7} "
+        f"events/frame={delivered / max(frames, 1):<6.1f} wall={elapsed:.2f}s"
+    )
+    if cpu_before is not None:
+        line += f" server_cpu={(cpu_after - cpu_before) / max(delivered, 1) * 1e6:.1f}µs/event"
+    print(line)
+    return delivered == events * sockets
+
+
+async def _run(base_url: str,
+               email: str,
+               recipient_email: str,
+               sockets: int,
+               events: int,
+               server_pid: int | None
+               ) -> int:
+    sender_token = create_access_token(data={"sub": email})
+    recipient_token = create_access_token(data={"sub": recipient_email.lower()})
+    recipient_id = await _recipient_id(recipient_email)
+
+    headers = {"Authorization": f"Bearer {sender_token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        response = await client.post("/chat/conversations", json={"recipient_id": recipient_id})
+        response.raise_for_status()
+        conversation_id = response.json()["id"]
+
+    ws_url = base_url.replace("http", "ws", 1).rstrip("/") + "/chat/ws"
+    ok = True
+    for batch in (False, True):
+        ok &= await _run_mode(
+            ws_url, sender_token, recipient_token, conversation_id, sockets, events, batch, server_pid
+        )
+    if not ok:
+        print("❌ Some receivers missed events.")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="Sender.")
+    parser.add_argument("--recipient-email", required=True, help="Owner of the receiving sockets.")
+    parser.add_argument("--sockets", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--server-pid", type=int, help="Server process to read CPU time from (Linux).")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(
+        _run(args.url, args.email, args.recipient_email, args.sockets, args.events, args.server_pid)
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare the chat WebSocket encodings on representative events.
+
+Builds message, receipt and presence events shaped like the ones the router
+broadcasts, encodes each ``--rounds`` times with every supported encoding and
+reports bytes per event, bytes after permessage-deflate (one zlib stream
+across ``--frames`` event triples with fresh ids, as the extension keeps its
+window between frames) and encoding time. No server or database is needed.
+
+Usage (from ``backend/``)::
+
+    uv run python -m scripts.bench_ws_encoding
+    uv run python -m scripts.bench_ws_encoding --rounds 50000
+
+Exits with status 1 when msgpack frames do not round-trip.
+"""
+import argparse
+import sys
+import time
+import uuid
+import zlib
+
+from src.chat.codec import decode, encode, supported_encodings
+from src.chat.constants import WebSocketEncoding
+from src.core.base_model import time_now
+
+
+def _events() -> list[dict]:
+    conversation_id = str(uuid.uuid4())
+    sender_id = str(uuid.uuid4())
+    now = time_now().isoformat()
+    return [
+        {
+            "type": "message",
+            "data": {
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "sender_id": sender_id,
+                "content": "Chào luật sư, tôi muốn hỏi về hợp đồng thuê nhà.",
+                "created_at": now,
+                "attachment_name": None,
+                "attachment_url": None,
+                "attachment_content_type": None,
+                "attachment_size": None,
+                "delivered_to": [],
+                "read_by": [],
+            },
+        },
+        {
+            "type": "receipt",
+            "data": {
+                "conversation_id": conversation_id,
+                "message_ids": [str(uuid.uuid4()) for _ in range(5)],
+                "status": "read",
+                "user_id": sender_id,
+            },
+        },
+        {
+            "type": "presence",
+            "data": {"user_id": sender_id, "status": "online", "last_seen_at": now},
+        },
+    ]
+
+
+def _measure(encoding: WebSocketEncoding, rounds: int, triples: int) -> tuple[float, float, float]:
+    events = _events()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for event in events:
+            encode(event, encoding)
+    elapsed = time.perf_counter() - started
+
+    # Fresh ids for every frame so deflate cannot just repeat earlier ones.
+    raw = compressed = frames = 0
+    deflate = zlib.compressobj(wbits=-15)
+    for _ in range(triples):
+        for event in _events():
+            frame = encode(event, encoding)
+            data = frame.encode() if isinstance(frame, str) else frame
+            raw += len(data)
+            # The extension drops the 4-byte sync flush trailer on the wire.
+            compressed += len(deflate.compress(data) + deflate.flush(zlib.Z_SYNC_FLUSH)) - 4
+            frames += 1
+    return raw / frames, compressed / frames, elapsed / (rounds * len(events)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20_000)
+    parser.add_argument("--frames", type=int, default=200, help="Event triples sent through one deflate stream.")
+    args = parser.parse_args()
+
+    for encoding in supported_encodings():
+        size, deflated, micros = _measure(encoding, args.rounds, args.frames)
+        print(f"{encoding.value:<13} bytes/event={size:<7.1f} deflated={deflated:<7.1f} encode={micros:.2f}µs/event")
+
+    if any(decode(encode(event, WebSocketEncoding.MSGPACK)) != event for event in _events()):
+        print("❌ msgpack frames do not decode back to the JSON events.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark presigned URL generation for lawyer verification documents.
+
+Compares the old per-call S3 client against the storage service by timing
+``_generate_document_urls`` (five presigns per request). Presigning is now
+done locally, so ``after`` measures pure signing/cache cost.
+
+Usage (from ``backend/``)::
+
+    uv run python -m scripts.benchmark_storage --moto
+    uv run python -m scripts.benchmark_storage --endpoint http://localhost:9000
+
+``--moto`` starts an in-process moto server, so no real bucket is needed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+
+DOCUMENT_KEYS = {
+    "identity_card_front_url": "lawyer_verifications/bench/front.png",
+    "identity_card_back_url": "lawyer_verifications/bench/back.png",
+    "portrait_url": "lawyer_verifications/bench/portrait.png",
+    "law_certificate_url": "lawyer_verifications/bench/certificate.pdf",
+    "bachelor_degree_url": "lawyer_verifications/bench/degree.pdf",
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<10} n={len(samples):<5} "
+        f"p50={_percentile(samples, 50) * 1000:8.2f} ms  "
+        f"p99={_percentile(samples, 99) * 1000:8.2f} ms  "
+        f"mean={statistics.fmean(samples) * 1000:8.2f} ms"
+    )
+
+
+async def _legacy_presign(key: str) -> str | None:
+    # Mirrors the helpers before the shared storage service existed.
+    from aiobotocore.session import get_session
+
+    from src.core.config import settings
+
+    session = get_session()
+    async with session.create_client(
+        "s3",
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        aws_access_key_id=settings.AWS_ACCESS_KEY,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    ) as client:
+        return await client.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": settings.S3_BUCKET, "Key": key},
+            ExpiresIn=3600,
+        )
+
+
+async def _run(iterations: int) -> None:
+    from src.lawyer.models import LawyerVerificationRequest
+    from src.lawyer.router import _generate_document_urls
+
+    request = LawyerVerificationRequest(user_id=uuid.uuid4(), years_of_experience=1, **DOCUMENT_KEYS)
+
+    before: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await asyncio.gather(*(_legacy_presign(key) for key in DOCUMENT_KEYS.values()))
+        before.append(time.perf_counter() - started)
+
+    _generate_document_urls(request)  # warm-up
+    after: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _generate_document_urls(request)
+        after.append(time.perf_counter() - started)
+
+    _report("before", before)
+    _report("after", after)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--endpoint", help="S3-compatible endpoint, e.g. a local minio.")
+    parser.add_argument("--moto", action="store_true", help="Start an in-process moto server.")
+    args = parser.parse_args()
+
+    server = None
+    if args.moto:
+        from moto.server import ThreadedMotoServer
+
+        server = ThreadedMotoServer(port=0)
+        server.start()
+        host, port = server.get_host_and_port()
+        args.endpoint = f"http://{host}:{port}"
+        os.environ.setdefault("AWS_ACCESS_KEY", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        os.environ.setdefault("AWS_REGION", "us-east-1")
+        os.environ.setdefault("S3_BUCKET", "legalconnect-bench")
+
+    if args.endpoint:
+        os.environ["S3_ENDPOINT_URL"] = args.endpoint
+
+    try:
+        asyncio.run(_run(args.iterations))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Check that deep chat history pages are served by an index range scan.
+
+Fills a throwaway conversation with ``--messages`` messages, then asks
+Postgres for the plan of the history queries issued by
+``ChatService.get_message_page`` deep into that history, in both directions.
+Each must walk ``chat_messages_conversation_id_create_at_id_idx`` (its copy
+on each monthly partition) without a sort. Everything runs inside a
+transaction that is rolled back at the end.
+
+Usage (from ``backend/``)::
+
+    uv run python -m scripts.check_chat_history_plan
+    uv run python -m scripts.check_chat_history_plan --messages 100000 --depth 90000
+
+Exits with status 1 when a query falls back to another plan.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import event, select, text
+
+from src.chat.models import ChatConversation, ChatMessage, ChatParticipant
+from src.chat.services import ChatService
+from src.core.database import SessionLocal, engine
+from src.user.models import User
+
+HISTORY_INDEX = "chat_messages_conversation_id_create_at_id_idx"
+
+
+@contextmanager
+def _capture_statements():
+    captured: list[tuple[str, object]] = []
+
+    def _on_execute(_conn, _cursor, statement, parameters, _context, _executemany) -> None:
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _on_execute)
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def _explain(session, statement: str, parameters) -> tuple[list[dict], float]:
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters)
+    raw = result.scalar_one()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    return list(_walk(plan["Plan"])), plan["Execution Time"]
+
+
+async def _history_index_names(session) -> set[str]:
+    """The partitioned history index and its per-partition children."""
+    result = await session.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits AS inherits
+            JOIN pg_class AS child ON child.oid = inherits.inhrelid
+            WHERE inherits.inhparent = to_regclass(:index)
+            """
+        ),
+        {"index": HISTORY_INDEX},
+    )
+    return {HISTORY_INDEX, *result.scalars().all()}
+
+
+async def _run(messages: int, depth: int, limit: int) -> int:
+    suffix = uuid.uuid4().hex[:8]
+    failures = 0
+    async with SessionLocal() as session:
+        async with session.begin():
+            sender = User(username=f"hp_sender_{suffix}", email=f"hp_sender_{suffix}@example.com", hashed_password="x")
+            recipient = User(username=f"hp_recipient_{suffix}", email=f"hp_recipient_{suffix}@example.com", hashed_password="x")
+            conversation = ChatConversation()
+            session.add_all([sender, recipient, conversation])
+            await session.flush()
+            session.add_all(
+                [
+                    ChatParticipant(conversation_id=conversation.id, user_id=sender.id),
+                    ChatParticipant(conversation_id=conversation.id, user_id=recipient.id),
+                ]
+            )
+            await session.flush()
+
+            # Server-side fill; every tenth timestamp is shared to exercise ties.
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO chat_messages (id, conversation_id, sender_id, content, create_at, updated_at)
+                    SELECT gen_random_uuid(), :conversation_id, :sender_id, 'history ' || n,
+                           now() - make_interval(secs => (:messages - n) / 10 * 10),
+                           now()
+                    FROM generate_series(1, :messages) AS n
+                    """
+                ),
+                {"conversation_id": conversation.id, "sender_id": sender.id, "messages": messages},
+            )
+            await session.execute(text("ANALYZE chat_messages"))
+
+            result = await session.execute(
+                select(ChatMessage.create_at, ChatMessage.id)
+                .where(ChatMessage.conversation_id == conversation.id)
+                .order_by(ChatMessage.create_at.desc(), ChatMessage.id.desc())
+                .offset(depth)
+                .limit(1)
+            )
+            anchor = tuple(result.one())
+
+            index_names = await _history_index_names(session)
+            service = ChatService(session)
+            for label, newer in (("older", False), ("newer", True)):
+                with _capture_statements() as captured:
+                    page, _ = await service.get_message_page(conversation.id, limit, anchor=anchor, newer=newer)
+                statement, parameters = captured[-1]
+                nodes, elapsed = await _explain(session, statement, parameters)
+
+                index_scans = [
+                    node for node in nodes
+                    if node["Node Type"] in ("Index Scan", "Index Only Scan")
+                    and node.get("Index Name") in index_names
+                ]
+                sorts = [node for node in nodes if node["Node Type"] == "Sort"]
+                ok = bool(index_scans) and not sorts and len(page) == limit
+                failures += not ok
+                print(
+                    f"{label:<6} depth={depth:<7} rows={len(page):<4} "
+                    f"plan={' > '.join(node['Node Type'] for node in nodes):<30} "
+                    f"time={elapsed:.2f}ms {'✅' if ok else '❌'}"
+                )
+            await session.rollback()
+
+    if failures:
+        print("❌ Deep history pages are not served by the history index.")
+        return 1
+    print("✅ Deep history pages are index range scans.")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=90_000, help="Messages between the newest one and the page.")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.messages, min(args.depth, args.messages - args.limit - 1), args.limit)))
+
+
+if __name__ == "__main__":
+    main()
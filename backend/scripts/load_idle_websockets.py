@@ -0,0 +1,70 @@
+"""Open many idle chat WebSockets and report how many DB connections they pin.
+
+Connects ``--sockets`` WebSockets to a running server as one user, waits,
+then reads ``/chat/health`` for the pool's checked-out count. Sockets only
+borrow a session while an event is being handled, so an idle crowd should
+hold zero connections.
+
+Usage (from ``backend/``, with the API already running)::
+
+    uv run python -m scripts.load_idle_websockets --email demo_client@example.com
+    uv run python -m scripts.load_idle_websockets --sockets 1000 --url http://localhost:8000
+
+Raise the open-file limit (``ulimit -n``) for large socket counts. Exits with
+status 1 if any connection is still checked out.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+import websockets
+
+from src.auth.services import create_access_token
+
+
+async def _open(url: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        return await websockets.connect(url, open_timeout=30, ping_interval=None)
+
+
+async def _run(base_url: str, email: str, sockets: int, idle_seconds: float, concurrency: int) -> int:
+    token = create_access_token(data={"sub": email})
+    ws_url = base_url.replace("http", "ws", 1).rstrip("/") + f"/chat/ws?token={token}"
+
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    connections = await asyncio.gather(*(_open(ws_url, semaphore) for _ in range(sockets)))
+    print(f"opened {len(connections)} sockets in {time.perf_counter() - started:.1f}s")
+
+    try:
+        await asyncio.sleep(idle_seconds)
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            health = (await client.get("/chat/health")).json()
+    finally:
+        await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+    pool = health["db_pool"]
+    print(f"send queues: {health['send_queues']}")
+    print(f"db pool: size={pool['size']} checked_out={pool['checked_out']}")
+    if pool["checked_out"]:
+        print("❌ Idle sockets are holding database connections.")
+        return 1
+    print("✅ Idle sockets hold no database connections.")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="Existing user to connect as.")
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=100, help="Handshakes in flight at once.")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.url, args.email, args.sockets, args.idle_seconds, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Check or repair ``lawyer_rating_summary`` against ``lawyer_rating``.
+
+The summary table is maintained on write by ``record_lawyer_rating``; this
+script recomputes the totals from raw ratings and reports (or fixes) any
+lawyer whose stored count/sum no longer match.
+
+Usage (from ``backend/``)::
+
+    uv run python -m scripts.rebuild_rating_summaries --check
+    uv run python -m scripts.rebuild_rating_summaries
+
+``--check`` exits with status 1 when drift is found and changes nothing.
+"""
+import argparse
+import asyncio
+import sys
+
+from src.booking.utils import find_rating_summary_drift, rebuild_lawyer_rating_summaries
+from src.core.database import SessionLocal
+
+
+async def _run(check_only: bool) -> int:
+    async with SessionLocal() as session:
+        if check_only:
+            drift = await find_rating_summary_drift(session)
+        else:
+            drift = await rebuild_lawyer_rating_summaries(session)
+            await session.commit()
+
+    for item in drift:
+        print(
+            f"{item.lawyer_id}: stored {item.stored_count}/{item.stored_sum}, "
+            f"actual {item.actual_count}/{item.actual_sum}"
+        )
+
+    if not drift:
+        print("✅ Rating summaries are in sync.")
+        return 0
+    if check_only:
+        print(f"❌ {len(drift)} summary row(s) drifted.")
+        return 1
+    print(f"✅ Rebuilt {len(drift)} summary row(s).")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Report drift without writing.")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.check)))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from src.booking.models import (
     LawyerRating,
     LawyerScheduleSlot,
 )
+from src.booking.utils import record_lawyer_rating
 from src.chat.models import ChatConversation, ChatMessage, ChatParticipant
 from src.core.database import DATABASE_URL, SessionLocal
 from src.lawyer.models import LawyerProfile
@@ -121,11 +122,17 @@ async def seed_data() -> None:
                 stars=5,
             )
             session.add(rating)
+            await record_lawyer_rating(session, lawyer.id, rating.stars)
 
             # ------------------------------------------------------------------
             # 4. Create chat conversation between client and lawyer
             # ------------------------------------------------------------------
-            conversation = ChatConversation(last_message_at=now)
+            low_id, high_id = sorted((client.id, lawyer.id))
+            conversation = ChatConversation(
+                last_message_at=now,
+                direct_user_low_id=low_id,
+                direct_user_high_id=high_id,
+            )
             session.add(conversation)
             await session.flush()
             session.add_all(
@@ -33,3 +33,7 @@ async def get_current_user(db: SessionDep,
         raise UserNotFound()
     
     return user
+
+
+async def current_user_rate_key(current_user: User = Depends(get_current_user)) -> str:
+    return f"user:{current_user.id}"
@@ -3,8 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.future import select
 from jose import JWTError
 
+from src.core.config import settings
 from src.core.database import SessionDep
 from src.core.exceptions import NotAuthenticated
+from src.core.rate_limit import rate_limit
 
 from src.auth.services import (
     create_access_token,
@@ -28,7 +30,10 @@ auth_route = APIRouter(
 
 #      LOGIN ROUTE      #
 
-@auth_route.post('/login')
+@auth_route.post('/login',
+                 dependencies=[Depends(rate_limit("auth:login",
+                                                  settings.LOGIN_RATE_LIMIT_MAX_EVENTS,
+                                                  settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS))])
 async def login(db: SessionDep,
                 login_request: OAuth2PasswordRequestForm = Depends()):
     
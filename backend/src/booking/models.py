@@ -97,4 +97,18 @@ class LawyerRating(Base):
         ForeignKey("user.id", ondelete="CASCADE"),
         nullable=False,
     )
-    stars: Mapped[int] = mapped_column(Integer, nullable=False)
\ No newline at end of file
+    stars: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class LawyerRatingSummary(Base):
+    """Per-lawyer running totals of ``lawyer_rating``, maintained on write."""
+
+    __tablename__ = "lawyer_rating_summary"
+
+    lawyer_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -48,6 +48,7 @@ from src.booking.utils import (
     delete_attachment,
     find_available_slot,
     generate_attachment_url,
+    record_lawyer_rating,
     slot_overlaps,
     upload_attachment,
 )
@@ -96,7 +97,7 @@ async def _get_case(db: SessionDep, case_id: UUID) -> CaseHistory:
 async def _build_booking_create_response(booking: BookingRequest) -> BookingRequestCreateResponse:
     attachment_url = None
     if booking.attachment_key:
-        attachment_url = await generate_attachment_url(booking.attachment_key)
+        attachment_url = generate_attachment_url(booking.attachment_key)
     data = await build_booking_response(booking)
     return BookingRequestCreateResponse(
         attachment_url=attachment_url,
@@ -104,8 +105,8 @@ async def _build_booking_create_response(booking: BookingRequest) -> BookingRequ
     )
 
 
-async def _build_case_response(case: CaseHistory) -> CaseHistoryResponse:
-    attachment_urls = await build_case_attachment_urls(case.attachment_keys or [])
+def _build_case_response(case: CaseHistory) -> CaseHistoryResponse:
+    attachment_urls = build_case_attachment_urls(case.attachment_keys or [])
     return CaseHistoryResponse(
         id=case.id,
         booking_request_id=case.booking_request_id,
@@ -444,7 +445,7 @@ async def decide_booking_request(
             select(CaseHistory).where(CaseHistory.booking_request_id == booking.id)
         )
         created_case = case.scalar_one()
-        case_response = await _build_case_response(created_case)
+        case_response = _build_case_response(created_case)
 
     booking_summary = BookingRequestSummary(**(await build_booking_response(booking)))
     return BookingDecisionResponse(
@@ -462,7 +463,7 @@ async def list_my_cases(db: SessionDep, current_user: User = Depends(get_current
     cases = result.scalars().all()
     responses: List[CaseHistoryResponse] = []
     for case in cases:
-        responses.append(await _build_case_response(case))
+        responses.append(_build_case_response(case))
     return responses
 
 
@@ -477,7 +478,7 @@ async def get_case_history(
     if current_user.id not in (case.client_id, case.lawyer_id) and current_user.role != UserRole.ADMIN.value:
         raise BookingForbidden()
 
-    return await _build_case_response(case)
+    return _build_case_response(case)
 
 
 @booking_route.patch("/cases/{case_id}", response_model=CaseHistoryResponse)
@@ -510,7 +511,7 @@ async def update_case_history(
 
     await db.commit()
     await db.refresh(case)
-    return await _build_case_response(case)
+    return _build_case_response(case)
 
 
 @booking_route.patch("/cases/{case_id}/notes", response_model=CaseHistoryResponse)
@@ -533,7 +534,7 @@ async def update_case_notes(
 
     await db.commit()
     await db.refresh(case)
-    return await _build_case_response(case)
+    return _build_case_response(case)
 
 
 @booking_route.post("/cases/{case_id}/attachments",
@@ -566,7 +567,7 @@ async def add_case_attachment(
     await db.commit()
     await db.refresh(case)
 
-    return await _build_case_response(case)
+    return _build_case_response(case)
 
 
 @booking_route.post("/cases/{case_id}/rating",
@@ -604,6 +605,7 @@ async def rate_case(
         stars=stars,
     )
     db.add(rating)
+    await record_lawyer_rating(db, case.lawyer_id, stars)
     await db.commit()
     await db.refresh(rating)
 
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable
 from uuid import uuid4, UUID
 
-from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
-from sqlalchemy import Select, and_, func, select
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.booking.constants import BookingRequestStatus
-from src.booking.models import BookingRequest, LawyerRating, LawyerScheduleSlot
-from src.core.config import settings
+from src.booking.models import (
+    BookingRequest,
+    LawyerRating,
+    LawyerRatingSummary,
+    LawyerScheduleSlot,
+)
+from src.core.base_model import time_now
+from src.core.storage import storage
 
 
 BOOKING_ATTACHMENT_ROOT = "booking_attachments"
@@ -36,57 +43,25 @@ def build_case_attachment_key(case_id: UUID | None, original_filename: str | Non
 
 
 async def upload_attachment(file_bytes: bytes, key: str, content_type: str | None) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.head_bucket(Bucket=settings.S3_BUCKET)
-            await client.put_object(
-                Bucket=settings.S3_BUCKET,
-                Key=key,
-                Body=file_bytes,
-                ContentType=content_type or DEFAULT_CONTENT_TYPE,
-            )
-            return key
-        except ClientError:
-            return None
+    try:
+        await storage.put_object(key, file_bytes, content_type or DEFAULT_CONTENT_TYPE)
+        return key
+    except ClientError:
+        return None
 
 
 async def delete_attachment(key: str) -> bool:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.delete_object(Bucket=settings.S3_BUCKET, Key=key)
-            return True
-        except ClientError:
-            return False
-
-
-async def generate_attachment_url(key: str, expires_in: int = 3600) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            return await client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params={"Bucket": settings.S3_BUCKET, "Key": key},
-                ExpiresIn=expires_in,
-            )
-        except ClientError:
-            return None
+    try:
+        await storage.delete_object(key)
+        return True
+    except ClientError:
+        return False
+
+
+def generate_attachment_url(key: str | None, expires_in: int = 3600) -> str | None:
+    if not key:
+        return None
+    return storage.generate_presigned_url(key, expires_in)
 
 
 async def find_available_slot(
@@ -124,15 +99,109 @@ async def slot_overlaps(
     return result.scalar_one() > 0
 
 
+@dataclass(frozen=True)
+class RatingSummaryDrift:
+    lawyer_id: UUID
+    stored_count: int
+    stored_sum: int
+    actual_count: int
+    actual_sum: int
+
+
 async def calculate_lawyer_rating(db: AsyncSession, lawyer_id: UUID) -> float | None:
-    stmt = select(func.count(LawyerRating.id), func.coalesce(func.sum(LawyerRating.stars), 0)).where(
-        LawyerRating.lawyer_id == lawyer_id
+    stmt = select(LawyerRatingSummary.rating_count, LawyerRatingSummary.rating_sum).where(
+        LawyerRatingSummary.lawyer_id == lawyer_id
     )
     result = await db.execute(stmt)
-    count, total = result.one()
-    if not count:
+    row = result.one_or_none()
+    if not row or not row.rating_count:
         return None
-    return round(total / count, 2)
+    return round(row.rating_sum / row.rating_count, 2)
+
+
+async def record_lawyer_rating(db: AsyncSession, lawyer_id: UUID, stars: int) -> None:
+    """Fold a new rating into the lawyer's summary row (caller commits)."""
+    now = time_now()
+    stmt = insert(LawyerRatingSummary).values(
+        id=uuid4(),
+        lawyer_id=lawyer_id,
+        rating_count=1,
+        rating_sum=stars,
+        create_at=now,
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LawyerRatingSummary.lawyer_id],
+        set_={
+            "rating_count": LawyerRatingSummary.rating_count + 1,
+            "rating_sum": LawyerRatingSummary.rating_sum + stars,
+            "updated_at": now,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def find_rating_summary_drift(db: AsyncSession) -> list[RatingSummaryDrift]:
+    actual = (
+        select(
+            LawyerRating.lawyer_id.label("lawyer_id"),
+            func.count(LawyerRating.id).label("rating_count"),
+            func.sum(LawyerRating.stars).label("rating_sum"),
+        )
+        .group_by(LawyerRating.lawyer_id)
+        .subquery()
+    )
+    stored_count = func.coalesce(LawyerRatingSummary.rating_count, 0)
+    stored_sum = func.coalesce(LawyerRatingSummary.rating_sum, 0)
+    actual_count = func.coalesce(actual.c.rating_count, 0)
+    actual_sum = func.coalesce(actual.c.rating_sum, 0)
+
+    stmt = (
+        select(
+            func.coalesce(actual.c.lawyer_id, LawyerRatingSummary.lawyer_id),
+            stored_count,
+            stored_sum,
+            actual_count,
+            actual_sum,
+        )
+        .select_from(actual)
+        .join(
+            LawyerRatingSummary,
+            LawyerRatingSummary.lawyer_id == actual.c.lawyer_id,
+            full=True,
+        )
+        .where(or_(stored_count != actual_count, stored_sum != actual_sum))
+    )
+    result = await db.execute(stmt)
+    return [RatingSummaryDrift(*row) for row in result.all()]
+
+
+async def rebuild_lawyer_rating_summaries(db: AsyncSession) -> list[RatingSummaryDrift]:
+    """Overwrite every drifted summary row with totals recomputed from ratings.
+
+    Returns the drift that was repaired; the caller commits.
+    """
+    drift = await find_rating_summary_drift(db)
+    now = time_now()
+    for item in drift:
+        stmt = insert(LawyerRatingSummary).values(
+            id=uuid4(),
+            lawyer_id=item.lawyer_id,
+            rating_count=item.actual_count,
+            rating_sum=item.actual_sum,
+            create_at=now,
+            updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LawyerRatingSummary.lawyer_id],
+            set_={
+                "rating_count": stmt.excluded.rating_count,
+                "rating_sum": stmt.excluded.rating_sum,
+                "updated_at": now,
+            },
+        )
+        await db.execute(stmt)
+    return drift
 
 
 async def build_booking_response(
@@ -154,9 +223,5 @@ async def build_booking_response(
     }
 
 
-async def build_case_attachment_urls(keys: Iterable[str]) -> list[str]:
-    urls: list[str] = []
-    for key in keys:
-        url = await generate_attachment_url(key)
-        urls.append(url or "")
-    return urls
\ No newline at end of file
+def build_case_attachment_urls(keys: Iterable[str]) -> list[str]:
+    return [generate_attachment_url(key) or "" for key in keys]
\ No newline at end of file
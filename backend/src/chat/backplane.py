@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.chat.constants import BackplaneKind
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.redis import get_redis
+
+logger = logging.getLogger("chat")
+
+DeliverFn = Callable[[Iterable[uuid.UUID], str], Awaitable[None]]
+
+
+def _new_node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class Backplane(ABC):
+    """Routes serialized chat events to the nodes holding each user's sockets.
+
+    Every node registers the users connected to it and refreshes that
+    registration with heartbeats; entries of a node that stops heartbeating
+    expire after ``ttl_seconds``. ``publish`` only reaches *other* nodes,
+    local delivery is the connection manager's job.
+    """
+
+    def __init__(self, *, node_id: str | None = None, ttl_seconds: int) -> None:
+        self.node_id = node_id or _new_node_id()
+        self.ttl_seconds = ttl_seconds
+
+
+    @abstractmethod
+    async def start(self, deliver: DeliverFn) -> None: ...
+
+
+    @abstractmethod
+    async def stop(self) -> None: ...
+
+
+    @abstractmethod
+    async def publish(self, user_ids: Iterable[uuid.UUID], message: str) -> None: ...
+
+
+    @abstractmethod
+    async def register(self, user_id: uuid.UUID) -> None: ...
+
+
+    @abstractmethod
+    async def unregister(self, user_id: uuid.UUID) -> None: ...
+
+
+    @abstractmethod
+    async def heartbeat(self, user_ids: Iterable[uuid.UUID]) -> None: ...
+
+
+    @abstractmethod
+    async def online_user_ids(self, user_ids: Iterable[uuid.UUID] | None = None) -> set[uuid.UUID]: ...
+
+
+    @abstractmethod
+    async def set_last_seen(self, user_id: uuid.UUID, seen_at: datetime) -> None: ...
+
+
+    @abstractmethod
+    async def get_last_seen(self, user_id: uuid.UUID) -> datetime | None: ...
+
+
+def _encode_envelope(user_ids: Iterable[uuid.UUID], message: str) -> str:
+    return f"{','.join(str(user_id) for user_id in user_ids)}\n{message}"
+
+
+def _decode_envelope(data: str) -> tuple[list[uuid.UUID], str]:
+    header, _, message = data.partition("\n")
+    return [uuid.UUID(raw) for raw in header.split(",") if raw], message
+
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis pub/sub with one channel per node.
+
+    Presence lives in ``chat:presence:{user_id}`` (node -> expiry) and the
+    cluster-wide ``chat:online`` set (user -> latest expiry), both scored by
+    epoch seconds so stale entries are ignored without a sweeper. Last-seen
+    times are a sorted set too, trimmed to ``last_seen_retention`` seconds on
+    every write. Expects a client created with ``decode_responses=True``.
+    """
+
+    PRESENCE_KEY = "chat:presence:{user_id}"
+    ONLINE_KEY = "chat:online"
+    LAST_SEEN_KEY = "chat:last_seen_at"
+    NODE_CHANNEL = "chat:node:{node_id}"
+
+    # KEYS: presence, online. ARGV: node, now, user.
+    _UNREGISTER_SCRIPT = """
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+    local latest = redis.call('ZREVRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if #latest == 0 then
+        redis.call('ZREM', KEYS[2], ARGV[3])
+    else
+        redis.call('ZADD', KEYS[2], latest[2], ARGV[3])
+    end
+    return #latest
+    """
+
+    def __init__(self,
+                 redis: Redis,
+                 *,
+                 node_id: str | None = None,
+                 ttl_seconds: int,
+                 last_seen_retention: int = settings.CHAT_LAST_SEEN_RETENTION_SECONDS
+                 ) -> None:
+        super().__init__(node_id=node_id, ttl_seconds=ttl_seconds)
+        self._redis = redis
+        self._last_seen_retention = last_seen_retention
+        self._unregister = redis.register_script(self._UNREGISTER_SCRIPT)
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+
+
+    @property
+    def channel(self) -> str:
+        return self.NODE_CHANNEL.format(node_id=self.node_id)
+
+
+    async def start(self, deliver: DeliverFn) -> None:
+        if self._reader is not None:
+            return
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read(deliver))
+
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+    async def _read(self, deliver: DeliverFn) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=None)
+            except RedisError as exc:
+                logger.warning("chat.backplane.read_failed", extra={"error": str(exc)})
+                await asyncio.sleep(1)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+
+            try:
+                user_ids, payload = _decode_envelope(message["data"])
+                await deliver(user_ids, payload)
+            except Exception:
+                logger.exception("chat.backplane.deliver_failed")
+
+
+    async def publish(self, user_ids: Iterable[uuid.UUID], message: str) -> None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        now = time.time()
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrangebyscore(self.PRESENCE_KEY.format(user_id=user_id), now, "+inf")
+                node_lists = await pipe.execute()
+
+            targets: dict[str, list[uuid.UUID]] = defaultdict(list)
+            for user_id, nodes in zip(user_ids, node_lists):
+                for node in nodes:
+                    if node != self.node_id:
+                        targets[node].append(user_id)
+            if not targets:
+                return
+
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for node, node_user_ids in targets.items():
+                    pipe.publish(
+                        self.NODE_CHANNEL.format(node_id=node),
+                        _encode_envelope(node_user_ids, message),
+                    )
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("chat.backplane.publish_failed", extra={"error": str(exc)})
+
+
+    async def register(self, user_id: uuid.UUID) -> None:
+        await self.heartbeat([user_id])
+
+
+    async def unregister(self, user_id: uuid.UUID) -> None:
+        try:
+            await self._unregister(
+                keys=[self.PRESENCE_KEY.format(user_id=user_id), self.ONLINE_KEY],
+                args=[self.node_id, time.time(), str(user_id)],
+            )
+        except RedisError as exc:
+            logger.warning("chat.backplane.unregister_failed", extra={"error": str(exc)})
+
+
+    async def heartbeat(self, user_ids: Iterable[uuid.UUID]) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    key = self.PRESENCE_KEY.format(user_id=user_id)
+                    pipe.zadd(key, {self.node_id: expires_at})
+                    pipe.expire(key, self.ttl_seconds)
+                    pipe.zadd(self.ONLINE_KEY, {str(user_id): expires_at}, gt=True)
+                pipe.zremrangebyscore(self.ONLINE_KEY, "-inf", now)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("chat.backplane.heartbeat_failed", extra={"error": str(exc)})
+
+
+    async def online_user_ids(self, user_ids: Iterable[uuid.UUID] | None = None) -> set[uuid.UUID]:
+        now = time.time()
+        if user_ids is None:
+            members = await self._redis.zrangebyscore(self.ONLINE_KEY, now, "+inf")
+            return {uuid.UUID(member) for member in members}
+
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        scores = await self._redis.zmscore(self.ONLINE_KEY, [str(user_id) for user_id in user_ids])
+        return {
+            user_id
+            for user_id, score in zip(user_ids, scores)
+            if score is not None and score > now
+        }
+
+
+    async def set_last_seen(self, user_id: uuid.UUID, seen_at: datetime) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(self.LAST_SEEN_KEY, {str(user_id): seen_at.timestamp()})
+                pipe.zremrangebyscore(self.LAST_SEEN_KEY, "-inf", time.time() - self._last_seen_retention)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("chat.backplane.last_seen_failed", extra={"error": str(exc)})
+
+
+    async def get_last_seen(self, user_id: uuid.UUID) -> datetime | None:
+        score = await self._redis.zscore(self.LAST_SEEN_KEY, str(user_id))
+        return datetime.fromtimestamp(score, timezone.utc) if score is not None else None
+
+
+class InMemoryBroker:
+    """Shared state for in-memory backplanes; one broker simulates one Redis."""
+
+    def __init__(self,
+                 *,
+                 last_seen_size: int = settings.CHAT_LAST_SEEN_CACHE_SIZE,
+                 last_seen_retention: int = settings.CHAT_LAST_SEEN_RETENTION_SECONDS
+                 ) -> None:
+        self.nodes: dict[str, DeliverFn] = {}
+        self.presence: dict[uuid.UUID, dict[str, float]] = defaultdict(dict)
+        self.last_seen: TTLCache[uuid.UUID, datetime] = TTLCache(last_seen_size, last_seen_retention)
+
+
+class InMemoryBackplane(Backplane):
+    """Single-process backplane for local development and tests.
+
+    Backplanes sharing a broker behave like nodes sharing one Redis, which
+    lets multi-worker fan-out be exercised without a server.
+    """
+
+    def __init__(self,
+                 broker: InMemoryBroker | None = None,
+                 *,
+                 node_id: str | None = None,
+                 ttl_seconds: int
+                 ) -> None:
+        super().__init__(node_id=node_id, ttl_seconds=ttl_seconds)
+        self.broker = broker or InMemoryBroker()
+
+
+    async def start(self, deliver: DeliverFn) -> None:
+        self.broker.nodes[self.node_id] = deliver
+
+
+    async def stop(self) -> None:
+        self.broker.nodes.pop(self.node_id, None)
+
+
+    async def publish(self, user_ids: Iterable[uuid.UUID], message: str) -> None:
+        now = time.time()
+        targets: dict[str, list[uuid.UUID]] = defaultdict(list)
+        for user_id in user_ids:
+            for node, expires_at in self.broker.presence.get(user_id, {}).items():
+                if node != self.node_id and expires_at > now:
+                    targets[node].append(user_id)
+
+        for node, node_user_ids in targets.items():
+            deliver = self.broker.nodes.get(node)
+            if deliver is not None:
+                await deliver(node_user_ids, message)
+
+
+    async def register(self, user_id: uuid.UUID) -> None:
+        await self.heartbeat([user_id])
+
+
+    async def unregister(self, user_id: uuid.UUID) -> None:
+        nodes = self.broker.presence.get(user_id)
+        if nodes is None:
+            return
+        nodes.pop(self.node_id, None)
+        if not nodes:
+            self.broker.presence.pop(user_id, None)
+
+
+    async def heartbeat(self, user_ids: Iterable[uuid.UUID]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        for user_id in user_ids:
+            self.broker.presence[user_id][self.node_id] = expires_at
+
+
+    async def online_user_ids(self, user_ids: Iterable[uuid.UUID] | None = None) -> set[uuid.UUID]:
+        now = time.time()
+        candidates = self.broker.presence.keys() if user_ids is None else user_ids
+        return {
+            user_id
+            for user_id in candidates
+            if any(expires_at > now for expires_at in self.broker.presence.get(user_id, {}).values())
+        }
+
+
+    async def set_last_seen(self, user_id: uuid.UUID, seen_at: datetime) -> None:
+        self.broker.last_seen.set(user_id, seen_at)
+
+
+    async def get_last_seen(self, user_id: uuid.UUID) -> datetime | None:
+        return self.broker.last_seen.get(user_id)
+
+
+def create_backplane() -> Backplane:
+    if settings.CHAT_BACKPLANE == BackplaneKind.MEMORY:
+        return InMemoryBackplane(ttl_seconds=settings.CHAT_PRESENCE_TTL_SECONDS)
+    return RedisBackplane(get_redis(), ttl_seconds=settings.CHAT_PRESENCE_TTL_SECONDS)
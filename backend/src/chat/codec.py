@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+import msgpack
+
+from src.chat.constants import WebSocketEncoding
+
+
+def supported_encodings() -> tuple[WebSocketEncoding, ...]:
+    return (WebSocketEncoding.MSGPACK, WebSocketEncoding.JSON)
+
+
+def negotiate_encoding(offered: list[str]) -> WebSocketEncoding | None:
+    """First subprotocol the client offered that this server can speak.
+
+    ``None`` means the client offered nothing usable; it gets JSON and no
+    ``Sec-WebSocket-Protocol`` in the handshake response, as before.
+    """
+    supported = supported_encodings()
+    for protocol in offered:
+        for encoding in supported:
+            if protocol == encoding.value:
+                return encoding
+    return None
+
+
+def encode(payload: Any, encoding: WebSocketEncoding) -> str | bytes:
+    if encoding is WebSocketEncoding.MSGPACK:
+        return msgpack.packb(_compact(payload), datetime=True, default=str)
+    return json.dumps(payload, default=str)
+
+
+def encode_batch(frames: list[str | bytes], encoding: WebSocketEncoding) -> str | bytes:
+    """Join already encoded events into one array frame."""
+    if encoding is WebSocketEncoding.MSGPACK:
+        return msgpack.Packer().pack_array_header(len(frames)) + b"".join(frames)
+    return f"[{','.join(frames)}]"
+
+
+def decode(frame: str | bytes) -> Any:
+    """Text frames are JSON and binary frames msgpack, whatever was negotiated.
+
+    Raises ``ValueError`` for anything that does not parse.
+    """
+    if isinstance(frame, str):
+        return json.loads(frame)
+    try:
+        payload = msgpack.unpackb(frame, timestamp=3)
+    except (ValueError, TypeError, msgpack.UnpackException) as exc:
+        raise ValueError("Invalid msgpack payload.") from exc
+    return _expand(payload)
+
+
+def _is_id_key(key: str) -> bool:
+    return key == "id" or key.endswith(("_id", "_ids"))
+
+
+def _uuid_bytes(value: str) -> bytes | str:
+    # ``uuid.UUID`` costs several times more than this on the hot path.
+    if len(value) != 36 or value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return value
+    try:
+        packed = bytes.fromhex(value.replace("-", ""))
+    except ValueError:
+        return value
+    # ``fromhex`` skips whitespace, which would not round-trip.
+    return packed if len(packed) == 16 else value
+
+
+def _compact(value: Any, key: str | None = None) -> Any:
+    """Pack ids as 16 raw bytes and timestamps as msgpack Timestamps.
+
+    Handlers build events with string ids and ISO timestamps for JSON, so
+    the field name decides: ``id``, ``*_id`` and ``*_ids`` hold UUIDs and
+    ``*_at`` holds timestamps. Anything that does not parse as one is left
+    alone, so free text is never touched.
+    """
+    if isinstance(value, dict):
+        return {item_key: _compact(item, item_key) for item_key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact(item, key) for item in value]
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        return value if value.tzinfo is not None else value.isoformat()
+    if isinstance(value, str) and key is not None:
+        if _is_id_key(key):
+            return _uuid_bytes(value)
+        if key.endswith("_at"):
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+            return parsed if parsed.tzinfo is not None else value
+    return value
+
+
+def _expand(value: Any, key: str | None = None) -> Any:
+    """Inverse of ``_compact`` so handlers keep seeing plain JSON types.
+
+    Like ``_compact`` it goes by field name: only 16-byte values under an id
+    key become UUID strings, other binary values are left as they are.
+    """
+    if isinstance(value, dict):
+        return {item_key: _expand(item, item_key) for item_key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item, key) for item in value]
+    if isinstance(value, bytes) and len(value) == 16 and key is not None and _is_id_key(key):
+        return str(uuid.UUID(bytes=value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
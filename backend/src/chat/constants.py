@@ -0,0 +1,35 @@
+from enum import StrEnum
+
+
+class BackplaneKind(StrEnum):
+    REDIS = "redis"
+    MEMORY = "memory"
+
+
+class HistoryDirection(StrEnum):
+    OLDER = "older"
+    NEWER = "newer"
+
+
+class PresenceStatus(StrEnum):
+    ONLINE = "online"
+    OFFLINE = "offline"
+
+
+class SlowConsumerPolicy(StrEnum):
+    DROP = "drop"
+    DISCONNECT = "disconnect"
+
+
+class WebSocketCapability(StrEnum):
+    # Events arrive as arrays, several per frame.
+    BATCH = "batch"
+    # The client answers {"type": "ping"} with {"type": "pong"}; a socket
+    # that stays silent past the idle timeout is closed.
+    HEARTBEAT = "heartbeat"
+
+
+class WebSocketEncoding(StrEnum):
+    # Negotiated as the WebSocket subprotocol; no subprotocol means JSON.
+    JSON = "chat.json"
+    MSGPACK = "chat.msgpack"
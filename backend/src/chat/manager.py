@@ -2,28 +2,279 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
+import time
 import uuid
 from collections import defaultdict
 from datetime import datetime
 from typing import Iterable
 
 from fastapi import WebSocket
+from sqlalchemy import bindparam, or_, update
 
+from src.chat.backplane import Backplane, create_backplane
+from src.chat.codec import encode, encode_batch
+from src.chat.constants import SlowConsumerPolicy, WebSocketCapability, WebSocketEncoding
 from src.core.base_model import time_now
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.user.models import User
+
+logger = logging.getLogger("chat")
+
+# "Try again later": the client fell too far behind and should reconnect.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Application code: nothing, not even a pong, arrived within the idle timeout.
+IDLE_CLOSE_CODE = 4408
+
+PING_PAYLOAD = {"type": "ping"}
+# Several presence updates in one event, for sockets with the batch
+# capability; every other socket gets one "presence" event per update.
+PRESENCE_BATCH_EVENT = "presence_batch"
+_PRESENCE_BATCH_MARKER = f'"{PRESENCE_BATCH_EVENT}"'
+
+
+class _Connection:
+    """One socket with its bounded outbound queue and writer task."""
+
+    __slots__ = ("user_id", "websocket", "queue", "writer", "evicted", "last_activity", "batch", "heartbeat", "encoding")
+
+    def __init__(self,
+                 user_id: uuid.UUID,
+                 websocket: WebSocket,
+                 maxsize: int,
+                 capabilities: frozenset[WebSocketCapability] = frozenset(),
+                 encoding: WebSocketEncoding = WebSocketEncoding.JSON
+                 ) -> None:
+        self.user_id = user_id
+        self.websocket = websocket
+        # Frames already encoded for ``encoding``: text for JSON, bytes for msgpack.
+        self.queue: asyncio.Queue[str | bytes] = asyncio.Queue(maxsize)
+        self.writer: asyncio.Task | None = None
+        self.evicted = False
+        # The client takes an array of events per frame.
+        self.batch = WebSocketCapability.BATCH in capabilities
+        # The client answers app-level pings and may be reaped when idle.
+        self.heartbeat = WebSocketCapability.HEARTBEAT in capabilities
+        self.encoding = encoding
+        # Monotonic time of the last frame received from the client.
+        self.last_activity = time.monotonic()
 
 
 class ConnectionManager:
-    def __init__(self) -> None:
+    """Holds this node's sockets and fans events out through the backplane.
+
+    Every socket gets a bounded queue drained by its own writer task, so
+    ``broadcast`` only serializes the event once and enqueues it; a slow
+    client never stalls other recipients or the sender's handler. When a
+    queue is full the event is dropped or the socket is closed, depending on
+    ``slow_consumer_policy``.
+
+    Dead peers are detected by uvicorn's protocol-level pings
+    (``--ws-ping-interval``/``--ws-ping-timeout``), which browsers answer on
+    their own. Sockets that connect with the ``heartbeat`` capability also
+    get an app-level ``ping`` after ``ping_interval`` quiet seconds and are
+    closed once silent for ``idle_timeout``. Last-seen times of closed sockets are
+    written to ``User.last_seen_at`` every ``last_seen_flush_interval``
+    seconds, one statement per batch.
+
+    Sockets that connect with the ``batch`` capability get everything queued
+    within ``batch_window`` seconds as one array frame, which saves a write
+    per event in busy conversations.
 
-        self._connections: dict[uuid.UUID, set[WebSocket]] = defaultdict(set)
-        self._last_seen: dict[uuid.UUID, datetime] = {}
+    Sockets that negotiated the ``chat.msgpack`` subprotocol get binary
+    msgpack frames. An event is encoded at most once per encoding, however
+    many sockets it goes to.
+    """
+
+    def __init__(self,
+                 backplane: Backplane | None = None,
+                 *,
+                 queue_size: int = settings.CHAT_SEND_QUEUE_SIZE,
+                 slow_consumer_policy: str = settings.CHAT_SLOW_CONSUMER_POLICY,
+                 ping_interval: float = settings.CHAT_WS_PING_INTERVAL_SECONDS,
+                 idle_timeout: float = settings.CHAT_WS_IDLE_TIMEOUT_SECONDS,
+                 last_seen_flush_interval: float = settings.CHAT_LAST_SEEN_FLUSH_SECONDS,
+                 batch_window: float = settings.CHAT_WS_BATCH_WINDOW_MS / 1000,
+                 batch_max_events: int = settings.CHAT_WS_BATCH_MAX_EVENTS
+                 ) -> None:
+
+        self._connections: dict[uuid.UUID, dict[WebSocket, _Connection]] = defaultdict(dict)
+        self._sockets: dict[WebSocket, _Connection] = {}
         self._lock = asyncio.Lock()
+        self._backplane = backplane or create_backplane()
+        self._heartbeat_task: asyncio.Task | None = None
+        self._queue_size = queue_size
+        self._slow_consumer_policy = SlowConsumerPolicy(slow_consumer_policy)
+        self._dropped_events = 0
+        self._slow_consumer_disconnects = 0
+        self._evictions: set[asyncio.Task] = set()
+        self._ping_interval = ping_interval
+        self._idle_timeout = idle_timeout
+        self._keepalive_task: asyncio.Task | None = None
+        self._idle_disconnects = 0
+        self._last_seen_flush_interval = last_seen_flush_interval
+        self._last_seen_task: asyncio.Task | None = None
+        # user id -> last seen, waiting for the next batch write.
+        self._pending_last_seen: dict[uuid.UUID, datetime] = {}
+        self._batch_window = batch_window
+        self._batch_max_events = batch_max_events
+        self._frames_sent = 0
+        self._events_sent = 0
+
+
+    @property
+    def node_id(self) -> str:
+        return self._backplane.node_id
+
 
+    async def start(self) -> None:
+        if self._heartbeat_task is not None:
+            return
+        await self._backplane.start(self._deliver_local)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self._ping_interval > 0:
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+        if self._last_seen_flush_interval > 0:
+            self._last_seen_task = asyncio.create_task(self._flush_last_seen_periodically())
+
+
+    async def stop(self) -> None:
+        for task in (self._heartbeat_task, self._keepalive_task, self._last_seen_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._heartbeat_task = self._keepalive_task = self._last_seen_task = None
 
-    async def connect(self, user_id: uuid.UUID, websocket: WebSocket) -> None:
         async with self._lock:
-            self._connections[user_id].add(websocket)
-            self._last_seen[user_id] = time_now()
+            user_ids = list(self._connections.keys())
+            connections = [
+                connection
+                for user_connections in self._connections.values()
+                for connection in user_connections.values()
+            ]
+        for connection in connections:
+            self._cancel_writer(connection)
+        for user_id in user_ids:
+            await self._backplane.unregister(user_id)
+        await self._backplane.stop()
+        if self._last_seen_flush_interval > 0:
+            self._pending_last_seen.update(dict.fromkeys(user_ids, time_now()))
+            try:
+                await self.flush_last_seen()
+            except Exception:
+                logger.exception("chat.last_seen.flush_failed")
+
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CHAT_PRESENCE_HEARTBEAT_SECONDS)
+            async with self._lock:
+                user_ids = list(self._connections.keys())
+            if user_ids:
+                await self._backplane.heartbeat(user_ids)
+
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self._ping_interval)
+            try:
+                await self.check_idle_connections()
+            except Exception:
+                logger.exception("chat.connection.keepalive_failed")
+
+
+    async def check_idle_connections(self) -> None:
+        """Ping heartbeat sockets that went quiet and reap those past the idle timeout."""
+        now = time.monotonic()
+        async with self._lock:
+            connections = [
+                connection
+                for user_connections in self._connections.values()
+                for connection in user_connections.values()
+                if connection.heartbeat and not connection.evicted
+            ]
+        for connection in connections:
+            idle = now - connection.last_activity
+            if idle >= self._idle_timeout:
+                self._idle_disconnects += 1
+                connection.evicted = True
+                self._spawn_eviction(connection, IDLE_CLOSE_CODE, "chat.connection.idle")
+            elif idle >= self._ping_interval:
+                try:
+                    connection.queue.put_nowait(encode(PING_PAYLOAD, connection.encoding))
+                except asyncio.QueueFull:
+                    # A backed-up queue is the slow-consumer policy's business.
+                    pass
+
+
+    def touch(self, websocket: WebSocket) -> None:
+        """Record that a frame arrived on ``websocket``."""
+        connection = self._sockets.get(websocket)
+        if connection is not None:
+            connection.last_activity = time.monotonic()
+
+
+    async def _flush_last_seen_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._last_seen_flush_interval)
+            try:
+                await self.flush_last_seen()
+            except Exception:
+                logger.exception("chat.last_seen.flush_failed")
+
+
+    async def flush_last_seen(self) -> int:
+        """Write pending last-seen times to ``User.last_seen_at`` in one batch."""
+        if not self._pending_last_seen:
+            return 0
+        pending, self._pending_last_seen = self._pending_last_seen, {}
+
+        stmt = (
+            update(User.__table__)
+            .where(
+                User.__table__.c.id == bindparam("user_id"),
+                or_(
+                    User.__table__.c.last_seen_at.is_(None),
+                    User.__table__.c.last_seen_at < bindparam("seen_at"),
+                ),
+            )
+            # Presence is not a profile edit; keep ``updated_at`` as it is.
+            .values(last_seen_at=bindparam("seen_at"), updated_at=User.__table__.c.updated_at)
+        )
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    stmt,
+                    [{"user_id": user_id, "seen_at": seen_at} for user_id, seen_at in pending.items()],
+                )
+                await db.commit()
+        except Exception:
+            # Retry with the next batch; newer disconnects take precedence.
+            for user_id, seen_at in pending.items():
+                self._pending_last_seen.setdefault(user_id, seen_at)
+            raise
+        return len(pending)
+
+
+    async def connect(self,
+                      user_id: uuid.UUID,
+                      websocket: WebSocket,
+                      capabilities: frozenset[WebSocketCapability] = frozenset(),
+                      encoding: WebSocketEncoding = WebSocketEncoding.JSON
+                      ) -> None:
+        connection = _Connection(user_id, websocket, self._queue_size, capabilities, encoding)
+        connection.writer = asyncio.create_task(self._write(connection))
+        async with self._lock:
+            first_connection = not self._connections[user_id]
+            self._connections[user_id][websocket] = connection
+            self._sockets[websocket] = connection
+        if first_connection:
+            await self._backplane.register(user_id)
 
 
     async def disconnect(self, user_id: uuid.UUID, websocket: WebSocket) -> None:
@@ -32,27 +283,162 @@ class ConnectionManager:
 
             if not connections:
                 return
-            connections.discard(websocket)
+            connection = connections.pop(websocket, None)
+            if connection is not None:
+                self._sockets.pop(websocket, None)
+                self._cancel_writer(connection)
 
             if not connections:
                 self._connections.pop(user_id, None)
-                self._last_seen[user_id] = time_now()
 
 
-    async def send_json(self, user_id: uuid.UUID, payload: dict) -> None:
-        message = json.dumps(payload, default=str)
-        async with self._lock:
-            connections = list(self._connections.get(user_id, set()))
-        for connection in connections:
+    def has_local_connections(self, user_id: uuid.UUID) -> bool:
+        return bool(self._connections.get(user_id))
+
+
+    async def release(self, user_id: uuid.UUID, seen_at: datetime) -> None:
+        """Stop routing to this node for a user with no sockets left here.
+
+        ``disconnect`` leaves the registration in place so presence can ride
+        out a quick reconnect; it lapses after the TTL if never released.
+        """
+        if self.has_local_connections(user_id):
+            return
+        await self._backplane.unregister(user_id)
+        await self._backplane.set_last_seen(user_id, seen_at)
+        if self._last_seen_flush_interval > 0:
+            self._pending_last_seen[user_id] = seen_at
+
+
+    @staticmethod
+    def _cancel_writer(connection: _Connection) -> None:
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+
+    async def _write(self, connection: _Connection) -> None:
+        while True:
+            message = await connection.queue.get()
+            events = 1
+            if connection.batch:
+                # Give the rest of this tick's events time to arrive; they are
+                # already serialized, so the frame is just their concatenation.
+                await asyncio.sleep(self._batch_window)
+                messages = [message]
+                while len(messages) < self._batch_max_events and not connection.queue.empty():
+                    messages.append(connection.queue.get_nowait())
+                events = len(messages)
+                message = encode_batch(messages, connection.encoding)
+            self._frames_sent += 1
+            self._events_sent += events
             try:
-                await connection.send_text(message)
-            except RuntimeError:
-                await self.disconnect(user_id, connection)
+                if isinstance(message, bytes):
+                    await connection.websocket.send_bytes(message)
+                else:
+                    await connection.websocket.send_text(message)
+            except Exception:
+                # Socket is gone; the receive loop will also notice and clean up.
+                await self.disconnect(connection.user_id, connection.websocket)
+                return
+
+
+    def _spawn_eviction(self, connection: _Connection, code: int, reason: str) -> None:
+        task = asyncio.create_task(self._evict(connection, code, reason))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+
+    async def _evict(self, connection: _Connection, code: int, reason: str) -> None:
+        logger.warning(
+            reason,
+            extra={"user_id": str(connection.user_id), "queue_size": self._queue_size},
+        )
+        await self.disconnect(connection.user_id, connection.websocket)
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+    async def send_json(self, user_id: uuid.UUID, payload: dict) -> None:
+        await self.broadcast([user_id], payload)
+
+
+    async def send_to_socket(self, websocket: WebSocket, payload: dict) -> None:
+        """Queue ``payload`` for one socket only, e.g. an error for its sender."""
+        connection = self._sockets.get(websocket)
+        if connection is None:
+            await websocket.send_text(encode(payload, WebSocketEncoding.JSON))
+            return
+        try:
+            connection.queue.put_nowait(encode(payload, connection.encoding))
+        except asyncio.QueueFull:
+            self._dropped_events += 1
 
 
     async def broadcast(self, user_ids: Iterable[uuid.UUID], payload: dict) -> None:
-        for user_id in user_ids:
-            await self.send_json(user_id, payload)
+        message = encode(payload, WebSocketEncoding.JSON)
+        user_ids = set(user_ids)
+        await self._deliver_local(user_ids, message, payload)
+        await self._backplane.publish(user_ids, message)
+
+
+    async def _deliver_local(self,
+                             user_ids: Iterable[uuid.UUID],
+                             message: str,
+                             payload: dict | None = None
+                             ) -> None:
+        """Queue the JSON ``message`` for local sockets, re-encoding it once
+        for each other encoding in use. ``payload`` saves parsing it back.
+        """
+        frames: dict[WebSocketEncoding, str | bytes] = {WebSocketEncoding.JSON: message}
+        # A presence batch split into single events, per encoding.
+        singles: dict[WebSocketEncoding, list[str | bytes]] = {}
+        async with self._lock:
+            targets = [
+                connection
+                for user_id in user_ids
+                for connection in self._connections.get(user_id, {}).values()
+            ]
+        for connection in targets:
+            if connection.evicted:
+                continue
+            # The marker check keeps other events from being parsed here.
+            if not connection.batch and _PRESENCE_BATCH_MARKER in message:
+                if payload is None:
+                    payload = json.loads(message)
+                if payload.get("type") == PRESENCE_BATCH_EVENT:
+                    events = singles.get(connection.encoding)
+                    if events is None:
+                        events = singles[connection.encoding] = [
+                            encode({"type": "presence", "data": update}, connection.encoding)
+                            for update in payload["data"]["updates"]
+                        ]
+                    for event in events:
+                        if not self._enqueue(connection, event):
+                            break
+                    continue
+            frame = frames.get(connection.encoding)
+            if frame is None:
+                if payload is None:
+                    payload = json.loads(message)
+                frame = frames[connection.encoding] = encode(payload, connection.encoding)
+            self._enqueue(connection, frame)
+
+
+    def _enqueue(self, connection: _Connection, frame: str | bytes) -> bool:
+        """Queue ``frame``; a full queue is handled by the slow-consumer policy."""
+        try:
+            connection.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if self._slow_consumer_policy is SlowConsumerPolicy.DROP:
+                self._dropped_events += 1
+                return False
+            self._slow_consumer_disconnects += 1
+            connection.evicted = True
+            self._spawn_eviction(connection, SLOW_CONSUMER_CLOSE_CODE, "chat.connection.slow_consumer")
+            return False
+        return True
 
 
     async def snapshot_connections(self) -> dict[uuid.UUID, set[WebSocket]]:
@@ -60,21 +446,36 @@ class ConnectionManager:
             return {user_id: set(conns) for user_id, conns in self._connections.items()}
 
 
-    async def is_online(self, user_id: uuid.UUID) -> bool:
+    async def get_metrics(self) -> dict[str, int]:
         async with self._lock:
-            return user_id in self._connections
+            depths = [
+                connection.queue.qsize()
+                for connections in self._connections.values()
+                for connection in connections.values()
+            ]
+        return {
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "dropped_events": self._dropped_events,
+            "slow_consumer_disconnects": self._slow_consumer_disconnects,
+            "idle_disconnects": self._idle_disconnects,
+            "frames_sent": self._frames_sent,
+            "events_sent": self._events_sent,
+            "pending_last_seen": len(self._pending_last_seen),
+        }
+
+
+    async def is_online(self, user_id: uuid.UUID) -> bool:
+        return bool(await self._backplane.online_user_ids([user_id]))
 
 
     async def get_online_user_ids(self, user_ids: Iterable[uuid.UUID] | None = None) -> set[uuid.UUID]:
-        async with self._lock:
-            if user_ids is None:
-                return set(self._connections.keys())
-            return {user_id for user_id in user_ids if user_id in self._connections}
+        return await self._backplane.online_user_ids(user_ids)
 
 
     async def get_last_seen(self, user_id: uuid.UUID) -> datetime | None:
-        async with self._lock:
-            return self._last_seen.get(user_id)
+        return await self._backplane.get_last_seen(user_id)
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.chat.exceptions import ConversationAccessForbidden
+from src.chat.models import ChatParticipant
+from src.core.cache import TTLCache
+from src.core.config import settings
+
+
+class MembershipCache:
+    """Process-wide cache of conversation id -> participant ids.
+
+    Participants are written through the ORM, which invalidates the affected
+    conversation here (see the mapper listeners below); the TTL bounds how
+    long another worker can keep serving a membership that changed under it.
+    Unknown conversations are never cached, so a new conversation is visible
+    everywhere as soon as it is committed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: TTLCache[uuid.UUID, frozenset[uuid.UUID]] = TTLCache(maxsize, ttl)
+        # Bumped on every invalidation so per-connection views can drop their copies.
+        self.generation = 0
+
+
+    async def get_participant_ids(self,
+                                  db: AsyncSession,
+                                  conversation_id: uuid.UUID
+                                  ) -> frozenset[uuid.UUID]:
+        participant_ids = self._entries.get(conversation_id)
+        if participant_ids is not None:
+            return participant_ids
+
+        result = await db.execute(
+            select(ChatParticipant.user_id).where(ChatParticipant.conversation_id == conversation_id)
+        )
+        participant_ids = frozenset(result.scalars().all())
+        if participant_ids:
+            self._entries.set(conversation_id, participant_ids)
+        return participant_ids
+
+
+    async def ensure_member(self,
+                            db: AsyncSession,
+                            conversation_id: uuid.UUID,
+                            user_id: uuid.UUID
+                            ) -> frozenset[uuid.UUID]:
+        participant_ids = await self.get_participant_ids(db, conversation_id)
+        if user_id not in participant_ids:
+            raise ConversationAccessForbidden()
+        return participant_ids
+
+
+    def invalidate(self, conversation_id: uuid.UUID) -> None:
+        self._entries.pop(conversation_id)
+        self.generation += 1
+
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+
+    def connection_view(self) -> ConnectionMembership:
+        return ConnectionMembership(self)
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ConnectionMembership:
+    """Memberships already checked on one WebSocket.
+
+    Avoids even the shared LRU bookkeeping for the conversations a socket
+    keeps talking in; any invalidation in the process empties it.
+    """
+
+    def __init__(self, cache: MembershipCache) -> None:
+        self._cache = cache
+        self._generation = cache.generation
+        self._entries: dict[uuid.UUID, tuple[float, frozenset[uuid.UUID]]] = {}
+
+
+    async def ensure_member(self,
+                            db: AsyncSession,
+                            conversation_id: uuid.UUID,
+                            user_id: uuid.UUID
+                            ) -> frozenset[uuid.UUID]:
+        if self._generation != self._cache.generation:
+            self._entries.clear()
+            self._generation = self._cache.generation
+
+        now = time.monotonic()
+        entry = self._entries.get(conversation_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        participant_ids = await self._cache.ensure_member(db, conversation_id, user_id)
+        self._entries[conversation_id] = (now + self._cache.ttl, participant_ids)
+        return participant_ids
+
+
+membership_cache = MembershipCache(
+    maxsize=settings.CHAT_MEMBERSHIP_CACHE_SIZE,
+    ttl=settings.CHAT_MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(ChatParticipant, "after_insert")
+@event.listens_for(ChatParticipant, "after_delete")
+def _invalidate_membership(_mapper, _connection, participant: ChatParticipant) -> None:
+    membership_cache.invalidate(participant.conversation_id)
+
+
+@event.listens_for(ChatParticipant, "after_update")
+def _invalidate_moved_membership(_mapper, _connection, participant: ChatParticipant) -> None:
+    # Unread counters and read markers change constantly; only a change of
+    # who sits in which conversation matters here.
+    attrs = inspect(participant).attrs
+    if not (attrs.conversation_id.history.has_changes() or attrs.user_id.history.has_changes()):
+        return
+    for conversation_id in {participant.conversation_id, *attrs.conversation_id.history.deleted}:
+        membership_cache.invalidate(conversation_id)
@@ -3,29 +3,84 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    TIMESTAMP,
+    Text,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.user.models import User
-from src.core.base_model import Base
+from src.core.base_model import Base, metadata, time_now
+
+# Orders every change a chat client may have missed: messages and participant
+# rows (joins, receipt watermarks, unread counters) take the next value on
+# insert and on every update. ``/chat/sync`` hands it out as a resume cursor.
+CHAT_CHANGE_SEQUENCE = Sequence("chat_change_seq", metadata=metadata)
+# Text search configuration created by the "chat message search" migration:
+# ``simple`` with unaccent, so queries match with or without Vietnamese marks.
+MESSAGE_SEARCH_CONFIG = "chat_search"
+
+
+def _change_seq_column() -> Mapped[int]:
+    return mapped_column(
+        BigInteger,
+        server_default=text("nextval('chat_change_seq')"),
+        onupdate=CHAT_CHANGE_SEQUENCE.next_value(),
+        nullable=False,
+        index=True,
+    )
 
 
 class ChatConversation(Base):
     __tablename__ = "chat_conversations"
+    __table_args__ = (
+        UniqueConstraint(
+            "direct_user_low_id",
+            "direct_user_high_id",
+            name="uq_chat_conversation_direct_pair",
+        ),
+        CheckConstraint(
+            "direct_user_low_id < direct_user_high_id",
+            name="direct_pair_sorted",
+        ),
+    )
 
     last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Canonical key of a one-to-one conversation: its two user ids, sorted.
+    direct_user_low_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("user.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    direct_user_high_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("user.id", ondelete="SET NULL"),
+        nullable=True,
+    )
 
     participants: Mapped[list["ChatParticipant"]] = relationship(
         "ChatParticipant",
         back_populates="conversation",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
     messages: Mapped[list["ChatMessage"]] = relationship(
         "ChatMessage",
         back_populates="conversation",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
 
 
@@ -49,21 +104,38 @@ class ChatParticipant(Base):
         nullable=False,
         index=True,
     )
+    # Receipt watermarks: ``create_at`` of the newest message this participant
+    # has received / read. Every earlier message counts as received / read,
+    # which holds because ChatService.create_message stamps ``create_at``
+    # under the conversation row lock, in commit order.
+    last_delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_seq: Mapped[int] = _change_seq_column()
 
     conversation: Mapped[ChatConversation] = relationship(
         "ChatConversation",
         back_populates="participants",
-        lazy="joined",
+        lazy="raise",
     )
     user: Mapped["User"] = relationship(
         "User",
-        lazy="joined",
+        lazy="raise",
     )
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # Monthly range partitions on ``create_at``; src/chat/partitions.py creates
+    # upcoming months and archives expired ones.
+    __table_args__ = {"postgresql_partition_by": "RANGE (create_at)"}
+
+    # The partition key has to be part of the primary key.
+    create_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        primary_key=True,
+        default=time_now,
+    )
 
     conversation_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("chat_conversations.id", ondelete="CASCADE"),
@@ -80,49 +152,36 @@ class ChatMessage(Base):
     attachment_key: Mapped[str | None] = mapped_column(String(512), nullable=True)
     attachment_content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
     attachment_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    change_seq: Mapped[int] = _change_seq_column()
+    # Maintained by Postgres for full-text search; never loaded by default.
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{MESSAGE_SEARCH_CONFIG}'::regconfig, COALESCE(content, ''::text))", persisted=True),
+        nullable=True,
+        deferred=True,
+    )
 
     conversation: Mapped[ChatConversation] = relationship(
         "ChatConversation",
         back_populates="messages",
-        lazy="joined",
+        lazy="raise",
     )
     sender: Mapped["User"] = relationship(
         "User",
-        lazy="joined",
-    )
-    receipts: Mapped[list["ChatMessageReceipt"]] = relationship(
-        "ChatMessageReceipt",
-        back_populates="message",
-        cascade="all, delete-orphan",
-        lazy="selectin",
-    )
-
-
-class ChatMessageReceipt(Base):
-    __tablename__ = "chat_message_receipts"
-    __table_args__ = (
-        UniqueConstraint(
-            "message_id",
-            "user_id",
-            name="uq_chat_message_receipt",
-        ),
+        lazy="raise",
     )
 
-    message_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("chat_messages.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
-    )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("user.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
-    )
-    delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    message: Mapped[ChatMessage] = relationship(
-        "ChatMessage",
-        back_populates="receipts",
-        lazy="joined",
-    )
\ No newline at end of file
+# History is keyset-paged on (create_at, id) within a conversation, in both
+# directions; one row comparison matches this index's order either way.
+Index(
+    "chat_messages_conversation_id_create_at_id_idx",
+    ChatMessage.conversation_id,
+    ChatMessage.create_at.desc(),
+    ChatMessage.id.desc(),
+)
+Index(
+    "chat_messages_search_vector_idx",
+    ChatMessage.search_vector,
+    postgresql_using="gin",
+)
@@ -1,14 +1,182 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
 import re
+import unicodedata
 from typing import Iterable
 
 from fastapi import HTTPException, status
 
+from src.core.config import settings
+
+logger = logging.getLogger("chat")
+
 BANNED_PATTERNS: tuple[re.Pattern[str], ...] = (
     re.compile(r"https?://[^\s]+", re.IGNORECASE),
 )
 
+# Combining marks (Vietnamese tones and vowel marks after NFD) go away and
+# "đ" becomes "d", so "đánh bạc", "danh bac" and "ĐÁNH BẠC" all compare equal.
+_FOLD_TABLE = {mark: None for mark in range(0x0300, 0x0370)} | {ord("đ"): "d"}
+
+
+def normalize_text(text: str) -> str:
+    """Case-, accent- and whitespace-insensitive form used for term matching."""
+    folded = unicodedata.normalize("NFD", text.casefold()).translate(_FOLD_TABLE)
+    return " ".join(folded.split())
+
+
+class TermMatcher:
+    """Aho–Corasick automaton over a set of banned terms.
+
+    One pass over the message finds any of the terms, so the cost grows with
+    the message length and not with the number of terms. Terms only match
+    whole words: "ass" does not match "class".
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "size")
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        # Terms ending at each state, including those reached by failure links.
+        self._out: list[tuple[str, ...]] = [()]
+        self.size = 0
+
+        for term in {normalize_text(term) for term in terms}:
+            if not term:
+                continue
+            state = 0
+            for char in term:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state] += (term,)
+            self.size += 1
+
+        # Breadth-first, so a state's failure target is final before its children.
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+
+    def find(self, text: str) -> str | None:
+        """First banned term in ``text`` (as normalized), or ``None``."""
+        if not self.size:
+            return None
+        text = normalize_text(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            after = end + 1
+            if after < len(text) and text[after].isalnum():
+                continue
+            for term in out[state]:
+                start = after - len(term)
+                if start == 0 or not text[start - 1].isalnum():
+                    return term
+        return None
+
+
+class BannedTerms:
+    """Banned term list read from ``path``, one term per line.
+
+    Blank lines and lines starting with ``#`` are skipped. Once started, the
+    file is checked every ``reload_interval`` seconds and the matcher is
+    rebuilt off the event loop when it changed; messages keep being checked
+    against the previous list until the new one is ready. A missing or
+    unreadable file keeps the last list that loaded.
+    """
+
+    def __init__(self,
+                 path: str = settings.CHAT_BANNED_TERMS_PATH,
+                 *,
+                 reload_interval: float = settings.CHAT_BANNED_TERMS_RELOAD_SECONDS
+                 ) -> None:
+        self._path = path
+        self._reload_interval = reload_interval
+        self._matcher: TermMatcher | None = None
+        self._version: tuple[int, int] | None = None
+        self._reload_task: asyncio.Task | None = None
+
+
+    @property
+    def matcher(self) -> TermMatcher:
+        if self._matcher is None:
+            self.reload()
+        return self._matcher
+
+
+    def reload(self) -> bool:
+        """Rebuild the matcher if the file changed; returns whether it did."""
+        try:
+            stat = os.stat(self._path)
+            version = (stat.st_mtime_ns, stat.st_size)
+            if version == self._version and self._matcher is not None:
+                return False
+            with open(self._path, encoding="utf-8") as terms_file:
+                terms = [
+                    line.strip()
+                    for line in terms_file
+                    if line.strip() and not line.lstrip().startswith("#")
+                ]
+        except OSError:
+            if self._matcher is None:
+                logger.warning("chat.moderation.terms_unavailable", extra={"path": self._path})
+                self._matcher = TermMatcher(())
+            return False
+
+        self._matcher = TermMatcher(terms)
+        self._version = version
+        logger.info("chat.moderation.terms_loaded", extra={"path": self._path, "terms": self._matcher.size})
+        return True
+
+
+    async def start(self) -> None:
+        if self._reload_task is None and self._reload_interval > 0:
+            await asyncio.to_thread(self.reload)
+            self._reload_task = asyncio.create_task(self._reload_periodically())
+
+
+    async def stop(self) -> None:
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+
+    async def _reload_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._reload_interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception:
+                logger.exception("chat.moderation.reload_failed")
+
+
+banned_terms = BannedTerms()
+
 
 def validate_message_content(content: str, *, max_length: int = 4000) -> None:
     if not content.strip():
@@ -30,6 +198,12 @@ def validate_message_content(content: str, *, max_length: int = 4000) -> None:
                 detail="Links are not allowed in chat messages at this time.",
             )
 
+    if banned_terms.matcher.find(content) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Message contains words that are not allowed.",
+        )
+
 
 def validate_attachment_content_type(content_type: str | None, allowed: Iterable[str]) -> None:
     if not content_type:
@@ -42,4 +216,4 @@ def validate_attachment_content_type(content_type: str | None, allowed: Iterable
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail="Attachment content type is not permitted.",
-        )
\ No newline at end of file
+        )
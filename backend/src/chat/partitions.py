@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.base_model import time_now
+from src.core.config import settings
+from src.core.database import engine
+from src.core.storage import storage
+
+logger = logging.getLogger("chat")
+
+PARENT_TABLE = "chat_messages"
+# Catches rows no monthly partition covers, so inserts never fail when the
+# cron job falls behind; ensure_message_partitions moves them out again.
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# Partitions are named after the month they hold, in UTC: chat_messages_y2026m10.
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+ARCHIVE_ROOT = "chat_archive"
+ARCHIVE_CONTENT_TYPE = "application/gzip"
+# Serializes partition DDL between app workers starting at the same time.
+_PARTITION_LOCK_KEY = 0x63686174  # "chat"
+# A detach needs a brief exclusive lock on chat_messages; rather than queue
+# traffic behind it, give up and let the next run try again.
+_DETACH_LOCK_TIMEOUT = "5s"
+
+
+@dataclass
+class ArchivedPartition:
+    name: str
+    rows: int
+    key: str
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partition_name(name: str) -> bool:
+    return name == DEFAULT_PARTITION or _PARTITION_NAME.match(name) is not None
+
+
+def archive_key(name: str) -> str:
+    return f"{ARCHIVE_ROOT}/{name}.csv.gz"
+
+
+def _partition_month(name: str) -> datetime | None:
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+
+
+async def _attached_partitions(connection: AsyncConnection) -> dict[str, bool]:
+    """Attached partition name -> whether a concurrent detach is pending."""
+    result = await connection.execute(
+        text(
+            """
+            SELECT child.relname, inherits.inhdetachpending
+            FROM pg_inherits AS inherits
+            JOIN pg_class AS child ON child.oid = inherits.inhrelid
+            WHERE inherits.inhparent = to_regclass(:parent)
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return {name: pending for name, pending in result.all()}
+
+
+async def _stored_columns(connection: AsyncConnection, name: str) -> list[str]:
+    """Columns of ``name`` that can be written; generated ones are recomputed by Postgres."""
+    result = await connection.execute(
+        text(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = :name AND is_generated = 'NEVER'
+            ORDER BY ordinal_position
+            """
+        ),
+        {"name": name},
+    )
+    return list(result.scalars().all())
+
+
+async def _default_partition_months(connection: AsyncConnection) -> list[datetime]:
+    """Months that have rows sitting in the default partition."""
+    result = await connection.execute(
+        text(
+            f"""
+            SELECT DISTINCT date_trunc('month', create_at, 'UTC')
+            FROM "{DEFAULT_PARTITION}"
+            """
+        )
+    )
+    return sorted(_month_start(month) for month in result.scalars().all())
+
+
+async def _create_partition(connection: AsyncConnection, month: datetime, *, from_default: bool) -> int:
+    """Create the partition for ``month``; returns the rows moved into it from the default partition.
+
+    Postgres refuses the new partition while the default one still holds
+    rows in its range, so those rows are parked in a temporary table first
+    and inserted again once the partition exists.
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), _add_months(month, 1).isoformat()
+    moved = 0
+    if from_default:
+        columns = ", ".join(f'"{column}"' for column in await _stored_columns(connection, DEFAULT_PARTITION))
+        await connection.execute(
+            text(f'CREATE TEMPORARY TABLE "{name}_parked" (LIKE "{DEFAULT_PARTITION}") ON COMMIT DROP')
+        )
+        result = await connection.execute(
+            text(
+                f"""
+                WITH parked AS (
+                    DELETE FROM "{DEFAULT_PARTITION}"
+                    WHERE create_at >= :lower AND create_at < :upper
+                    RETURNING {columns}
+                )
+                INSERT INTO "{name}_parked" ({columns}) SELECT {columns} FROM parked
+                """
+            ),
+            {"lower": month, "upper": _add_months(month, 1)},
+        )
+        moved = result.rowcount
+    # Bounds come from datetimes, never from input; DDL takes no bind parameters.
+    await connection.execute(
+        text(f'CREATE TABLE "{name}" PARTITION OF {PARENT_TABLE} ' f"FOR VALUES FROM ('{lower}') TO ('{upper}')")
+    )
+    if from_default:
+        await connection.execute(
+            text(f'INSERT INTO {PARENT_TABLE} ({columns}) SELECT {columns} FROM "{name}_parked"')
+        )
+    return moved
+
+
+async def ensure_message_partitions(connection: AsyncConnection,
+                                    *,
+                                    months_ahead: int = settings.CHAT_MESSAGE_PARTITIONS_AHEAD,
+                                    now: datetime | None = None
+                                    ) -> list[str]:
+    """Create the monthly partitions from this month to ``months_ahead`` months out.
+
+    Months with rows in the default partition get their partition too, and
+    those rows are moved into it. Rows only land there when the months
+    ahead ran out, so that is logged as a warning. Runs inside the caller's
+    transaction; returns the partitions it created.
+    """
+    await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PARTITION_LOCK_KEY})
+    existing = await _attached_partitions(connection)
+    current = _month_start(now or time_now())
+
+    stranded = await _default_partition_months(connection) if DEFAULT_PARTITION in existing else []
+    months = sorted({*(_add_months(current, offset) for offset in range(months_ahead + 1)), *stranded})
+
+    created: list[str] = []
+    moved = 0
+    for month in months:
+        name = partition_name(month)
+        if name in existing:
+            continue
+        moved += await _create_partition(connection, month, from_default=month in stranded)
+        created.append(name)
+    if created:
+        logger.info("chat.partitions.created", extra={"partitions": created})
+    if moved:
+        logger.warning(
+            "chat.partitions.default_rows_moved",
+            extra={"rows": moved, "partitions": [partition_name(month) for month in stranded]},
+        )
+    return created
+
+
+async def _export_partition(connection: AsyncConnection, name: str) -> ArchivedPartition:
+    """Upload a detached partition to ``chat_archive/<name>.csv.gz`` in the S3 bucket and drop it."""
+    # Generated columns (the search vector) are left out: they cannot be
+    # loaded back and Postgres recomputes them.
+    columns = await _stored_columns(connection, name)
+    key = archive_key(name)
+
+    raw = await connection.get_raw_connection()
+    # Spooled to a temporary file rather than memory: a month can be large.
+    with tempfile.TemporaryFile() as spool:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as archive:
+            async def _write(chunk: bytes) -> None:
+                archive.write(chunk)
+
+            status = await raw.driver_connection.copy_from_table(
+                name, columns=columns, output=_write, format="csv", header=True
+            )
+        spool.seek(0)
+        await storage.put_object(key, spool, ARCHIVE_CONTENT_TYPE)
+    # Only once the object is stored is the data dropped.
+    await connection.execute(text(f'DROP TABLE "{name}"'))
+    return ArchivedPartition(name=name, rows=int(status.split()[-1]), key=key)
+
+
+async def archive_message_partitions(bind: AsyncEngine = engine,
+                                     *,
+                                     retention_months: int = settings.CHAT_MESSAGE_RETENTION_MONTHS,
+                                     now: datetime | None = None
+                                     ) -> list[ArchivedPartition]:
+    """Move whole months older than ``retention_months`` out of the database.
+
+    Each partition is detached, then uploaded as a gzipped CSV to the S3
+    bucket and dropped. Postgres cannot detach concurrently while the
+    default partition exists, so a detach that does not get its lock within
+    ``_DETACH_LOCK_TIMEOUT`` is left for the next run. A run interrupted
+    halfway is picked up by the next one: a pending detach is finalized and
+    detached tables left behind are exported. ``retention_months`` of 0
+    archives nothing.
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months(_month_start(now or time_now()), -retention_months)
+
+    # DETACH ... FINALIZE cannot run inside a transaction block.
+    async with bind.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        for name, pending in (await _attached_partitions(connection)).items():
+            month = _partition_month(name)
+            if month is None or _add_months(month, 1) > cutoff:
+                continue
+            if pending:
+                await connection.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}" FINALIZE'))
+            else:
+                try:
+                    async with bind.begin() as detach:
+                        await detach.execute(text(f"SET LOCAL lock_timeout = '{_DETACH_LOCK_TIMEOUT}'"))
+                        await detach.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+                except DBAPIError as exc:
+                    logger.warning("chat.partitions.detach_skipped", extra={"partition": name, "error": str(exc.orig)})
+                    continue
+            logger.info("chat.partitions.detached", extra={"partition": name})
+
+        result = await connection.execute(
+            text(
+                """
+                SELECT relname FROM pg_class
+                WHERE relkind = 'r'
+                  AND relnamespace = CAST('public' AS regnamespace)
+                  AND relname LIKE :prefix
+                  AND NOT relispartition
+                """
+            ),
+            {"prefix": f"{PARENT_TABLE}_y%"},
+        )
+        archived: list[ArchivedPartition] = []
+        for name in sorted(result.scalars().all()):
+            month = _partition_month(name)
+            if month is None or _add_months(month, 1) > cutoff:
+                continue
+            archived.append(await _export_partition(connection, name))
+            logger.info("chat.partitions.archived", extra={"partition": name, "rows": archived[-1].rows})
+    return archived
+
+
+async def maintain_chat_message_partitions(_ctx: dict) -> dict[str, list[str]]:
+    """arq cron job: keep future partitions ahead and archive expired ones."""
+    async with engine.begin() as connection:
+        created = await ensure_message_partitions(connection)
+    archived = await archive_message_partitions()
+    return {"created": created, "archived": [partition.key for partition in archived]}
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable
+
+from fastapi import WebSocket
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.chat.constants import PresenceStatus, WebSocketCapability, WebSocketEncoding
+from src.chat.manager import PRESENCE_BATCH_EVENT, ConnectionManager, manager
+from src.chat.models import ChatParticipant
+from src.core.base_model import time_now
+from src.core.cache import TTLCache
+from src.core.config import settings
+
+logger = logging.getLogger("chat")
+
+
+class PresenceService:
+    """Tells a user's contacts when they come online and go offline.
+
+    Going offline is only announced after ``grace`` seconds with no socket
+    anywhere in the cluster, so a phone hopping between networks reconnects
+    without anyone noticing. Until then the user stays registered with the
+    backplane, which also covers a reconnect that lands on another node.
+
+    Announcements are queued per recipient and flushed every
+    ``flush_interval`` seconds; a recipient gets one frame per flush with the
+    latest state of each contact that changed. Contact sets are cached.
+    """
+
+    def __init__(self,
+                 connections: ConnectionManager,
+                 *,
+                 grace: float = settings.CHAT_PRESENCE_GRACE_SECONDS,
+                 flush_interval: float = settings.CHAT_PRESENCE_FLUSH_SECONDS,
+                 contact_cache_size: int = settings.CHAT_CONTACT_CACHE_SIZE,
+                 contact_cache_ttl: float = settings.CHAT_CONTACT_CACHE_TTL_SECONDS
+                 ) -> None:
+        self._connections = connections
+        self._grace = grace
+        self._flush_interval = flush_interval
+        self._contacts: TTLCache[uuid.UUID, frozenset[uuid.UUID]] = TTLCache(
+            contact_cache_size,
+            contact_cache_ttl,
+        )
+        # user id -> task announcing them offline once the grace window ends.
+        self._pending_offline: dict[uuid.UUID, asyncio.Task] = {}
+        # recipient id -> contact id -> latest update for the next flush.
+        self._outbox: dict[uuid.UUID, dict[uuid.UUID, dict[str, str]]] = defaultdict(dict)
+        self._flush_task: asyncio.Task | None = None
+        self._suppressed_transitions = 0
+
+
+    async def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        pending, self._pending_offline = self._pending_offline, {}
+        for task in pending.values():
+            task.cancel()
+        now = time_now()
+        for user_id in pending:
+            await self._connections.release(user_id, now)
+
+
+    async def get_contact_ids(self, db: AsyncSession, user_id: uuid.UUID) -> frozenset[uuid.UUID]:
+        """Everyone sharing a conversation with ``user_id``."""
+        contact_ids = self._contacts.get(user_id)
+        if contact_ids is not None:
+            return contact_ids
+
+        me = aliased(ChatParticipant)
+        other = aliased(ChatParticipant)
+        result = await db.execute(
+            select(other.user_id)
+            .join(me, me.conversation_id == other.conversation_id)
+            .where(me.user_id == user_id, other.user_id != user_id)
+            .distinct()
+        )
+        contact_ids = frozenset(result.scalars().all())
+        self._contacts.set(user_id, contact_ids)
+        return contact_ids
+
+
+    def invalidate_contacts(self, user_id: uuid.UUID) -> None:
+        self._contacts.pop(user_id)
+
+
+    async def connect(self,
+                      user_id: uuid.UUID,
+                      websocket: WebSocket,
+                      contact_ids: Iterable[uuid.UUID],
+                      capabilities: frozenset[WebSocketCapability] = frozenset(),
+                      encoding: WebSocketEncoding = WebSocketEncoding.JSON
+                      ) -> None:
+        """Register the socket; announce the user only if they were offline."""
+        pending = self._pending_offline.pop(user_id, None)
+        if pending is not None:
+            pending.cancel()
+            self._suppressed_transitions += 1
+            was_online = True
+        else:
+            was_online = await self._connections.is_online(user_id)
+
+        await self._connections.connect(user_id, websocket, capabilities, encoding)
+        if not was_online:
+            self._announce(contact_ids, user_id, PresenceStatus.ONLINE, time_now())
+
+
+    async def disconnect(self,
+                         user_id: uuid.UUID,
+                         websocket: WebSocket,
+                         contact_ids: Iterable[uuid.UUID]
+                         ) -> None:
+        """Drop the socket; start the grace window if it was the user's last one here."""
+        await self._connections.disconnect(user_id, websocket)
+        if self._connections.has_local_connections(user_id) or user_id in self._pending_offline:
+            return
+        self._pending_offline[user_id] = asyncio.create_task(
+            self._go_offline(user_id, frozenset(contact_ids), time_now())
+        )
+
+
+    async def _go_offline(self,
+                          user_id: uuid.UUID,
+                          contact_ids: frozenset[uuid.UUID],
+                          seen_at: datetime
+                          ) -> None:
+        await asyncio.sleep(self._grace)
+        self._pending_offline.pop(user_id, None)
+        try:
+            await self._connections.release(user_id, seen_at)
+            if await self._connections.is_online(user_id):
+                # Reconnected on another node within the window.
+                self._suppressed_transitions += 1
+                return
+        except Exception:
+            logger.exception("chat.presence.release_failed", extra={"user_id": str(user_id)})
+        self._announce(contact_ids, user_id, PresenceStatus.OFFLINE, seen_at)
+
+
+    def _announce(self,
+                  recipient_ids: Iterable[uuid.UUID],
+                  user_id: uuid.UUID,
+                  status: PresenceStatus,
+                  seen_at: datetime
+                  ) -> None:
+        update = {
+            "user_id": str(user_id),
+            "status": status.value,
+            "last_seen_at": seen_at.isoformat(),
+        }
+        for recipient_id in recipient_ids:
+            self._outbox[recipient_id][user_id] = update
+
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("chat.presence.flush_failed")
+
+
+    async def flush(self) -> int:
+        """Send every queued update; returns the number of broadcasts.
+
+        Recipients waiting for the same updates (all contacts of one user who
+        just came online, typically) share one broadcast. Several updates go
+        out as one ``presence_batch`` event, which the connection manager
+        splits into ``presence`` events for sockets without the batch
+        capability.
+        """
+        if not self._outbox:
+            return 0
+        outbox, self._outbox = self._outbox, defaultdict(dict)
+
+        groups: dict[tuple, list[uuid.UUID]] = defaultdict(list)
+        updates_by_key: dict[tuple, list[dict[str, str]]] = {}
+        for recipient_id, updates in outbox.items():
+            ordered = [updates[user_id] for user_id in sorted(updates)]
+            key = tuple((update["user_id"], update["status"], update["last_seen_at"]) for update in ordered)
+            groups[key].append(recipient_id)
+            updates_by_key.setdefault(key, ordered)
+
+        for key, recipient_ids in groups.items():
+            updates = updates_by_key[key]
+            if len(updates) == 1:
+                frame = {"type": "presence", "data": updates[0]}
+            else:
+                # Split again for sockets without the batch capability.
+                frame = {"type": PRESENCE_BATCH_EVENT, "data": {"updates": updates}}
+            await self._connections.broadcast(recipient_ids, frame)
+        return len(groups)
+
+
+    def get_metrics(self) -> dict[str, int]:
+        return {
+            "pending_offline": len(self._pending_offline),
+            "queued_recipients": len(self._outbox),
+            "suppressed_transitions": self._suppressed_transitions,
+            "cached_contact_sets": len(self._contacts),
+        }
+
+
+presence = PresenceService(manager)
+
+
+@event.listens_for(ChatParticipant, "after_insert")
+@event.listens_for(ChatParticipant, "after_delete")
+def _invalidate_contacts(_mapper, _connection, participant: ChatParticipant) -> None:
+    # Both sides of a new conversation are inserted, so both get invalidated.
+    presence.invalidate_contacts(participant.user_id)
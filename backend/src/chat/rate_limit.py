@@ -1,42 +1,36 @@
 from __future__ import annotations
 
-import asyncio
-import time
+import math
 import uuid
-from collections import defaultdict, deque
-from typing import Deque
 
 from src.chat.exceptions import RateLimitExceeded
 from src.core.config import settings
+from src.core.rate_limit import RateLimiter, rate_limiter as shared_rate_limiter
 
 
-class SlidingWindowRateLimiter:
-    def __init__(self, max_events: int, window_seconds: int) -> None:
+class ChatRateLimiter:
+    """Per-user message limit on top of the shared (Redis or local) limiter."""
+
+    def __init__(self, limiter: RateLimiter, max_events: int, window_seconds: int) -> None:
+        self._limiter = limiter
         self._max_events = max_events
         self._window = window_seconds
-        self._events: dict[uuid.UUID, Deque[float]] = defaultdict(deque)
-        self._lock = asyncio.Lock()
-
-    async def hit(self, user_id: uuid.UUID) -> None:
-        now = time.monotonic()
-        async with self._lock:
-            events = self._events[user_id]
-            cutoff = now - self._window
-            while events and events[0] < cutoff:
-                events.popleft()
 
-            if len(events) >= self._max_events:
-                retry_after = max(int(events[0] + self._window - now), 1)
-                raise RateLimitExceeded(retry_after)
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"chat:message:{user_id}"
 
-            events.append(now)
+    async def hit(self, user_id: uuid.UUID) -> None:
+        retry_after = await self._limiter.acquire(self._key(user_id), self._max_events, self._window)
+        if retry_after:
+            raise RateLimitExceeded(max(math.ceil(retry_after), 1))
 
     async def reset(self, user_id: uuid.UUID) -> None:
-        async with self._lock:
-            self._events.pop(user_id, None)
+        await self._limiter.reset(self._key(user_id))
 
 
-rate_limiter = SlidingWindowRateLimiter(
+rate_limiter = ChatRateLimiter(
+    shared_rate_limiter,
     max_events=settings.CHAT_RATE_LIMIT_MAX_EVENTS,
     window_seconds=settings.CHAT_RATE_LIMIT_WINDOW_SECONDS,
-)
\ No newline at end of file
+)
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import json
 import logging
 import uuid
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import datetime, timedelta
 
 from fastapi import (
     APIRouter,
@@ -11,12 +11,14 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Query,
+    Response,
     UploadFile,
     WebSocket,
     WebSocketDisconnect,
 )
 from sqlalchemy import select
-from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm import selectinload
 
 from src.auth.dependencies import get_current_user
 from src.auth.exceptions import InvalidToken
@@ -25,25 +27,36 @@ from src.chat.exceptions import (
     AttachmentTooLarge,
     AttachmentUploadFailed,
     ConversationAccessForbidden,
+    MessageNotFound,
+    RateLimitExceeded,
 )
+from src.chat.codec import decode, negotiate_encoding
+from src.chat.constants import HistoryDirection, WebSocketCapability, WebSocketEncoding
 from src.chat.manager import manager
+from src.chat.membership import ConnectionMembership, membership_cache
 from src.chat.moderation import (
     validate_attachment_content_type,
     validate_message_content,
 )
+from src.chat.presence import presence
 from src.chat.rate_limit import rate_limiter
 from src.chat.models import ChatConversation, ChatMessage, ChatParticipant
 from src.chat.schemas import (
+    ChatAcknowledgeResponse,
+    ChatConversationAcknowledge,
     ChatConversationCreate,
     ChatConversationResponse,
     ChatMessageAcknowledge,
     ChatMessageCreate,
     ChatMessageResponse,
     ChatParticipantResponse,
+    ChatSyncResponse,
+    ChatUnreadConversation,
+    ChatUnreadSummary,
     ChatUserSummary,
     MessageDeliveryStatus,
 )
-from src.chat.services import ChatService
+from src.chat.services import ChatAcknowledgement, ChatService
 from src.chat.utils import (
     build_chat_attachment_key,
     generate_attachment_url,
@@ -51,7 +64,9 @@ from src.chat.utils import (
 )
 from src.core.base_model import time_now
 from src.core.config import settings
-from src.core.database import SessionDep, SessionLocal
+from src.core.database import SessionDep, SessionLocal, engine
+from src.core.exceptions import InvalidCursor
+from src.core.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, decode_cursor, encode_cursor
 from src.user.models import User
 
 chat_route = APIRouter(
@@ -61,6 +76,12 @@ chat_route = APIRouter(
 
 logger = logging.getLogger("chat")
 
+# Chat relationships raise on lazy access; this is everything a
+# ChatConversationResponse needs. Message history is never loaded.
+CONVERSATION_RESPONSE_OPTIONS = (
+    selectinload(ChatConversation.participants).selectinload(ChatParticipant.user),
+)
+
 
 def _chat_service(db: SessionDep) -> ChatService:
     return ChatService(db)
@@ -71,7 +92,14 @@ async def chat_health() -> dict[str, object]:
     online_users = await manager.get_online_user_ids()
     return {
         "status": "ok",
+        "node": manager.node_id,
         "online_users": len(online_users),
+        "send_queues": await manager.get_metrics(),
+        "presence": presence.get_metrics(),
+        "db_pool": {
+            "size": engine.pool.size(),
+            "checked_out": engine.pool.checkedout(),
+        },
     }
 
 
@@ -84,24 +112,28 @@ def _serialize_participant(participant: ChatParticipant) -> ChatParticipantRespo
             email=participant.user.email,
         ),
         joined_at=participant.create_at,
+        last_delivered_at=participant.last_delivered_at,
         last_read_at=participant.last_read_at,
     )
 
 
-async def _serialize_message(message: ChatMessage) -> ChatMessageResponse:
-    attachment_url = None
-    if message.attachment_key:
-        attachment_url = await generate_attachment_url(message.attachment_key)
-    delivered_to = [
-        receipt.user_id
-        for receipt in message.receipts
-        if receipt.delivered_at is not None
-    ]
-    read_by = [
-        receipt.user_id
-        for receipt in message.receipts
-        if receipt.read_at is not None
-    ]
+def _serialize_message(message: ChatMessage,
+                       participants: Iterable[ChatParticipant] = ()
+                       ) -> ChatMessageResponse:
+    """Serialize ``message`` with receipts derived from participant watermarks.
+
+    A message nobody else can have seen yet (one just sent) needs none.
+    """
+    attachment_url = generate_attachment_url(message.attachment_key)
+    delivered_to: list[uuid.UUID] = []
+    read_by: list[uuid.UUID] = []
+    for participant in participants:
+        if participant.user_id == message.sender_id:
+            continue
+        if participant.last_delivered_at and participant.last_delivered_at >= message.create_at:
+            delivered_to.append(participant.user_id)
+        if participant.last_read_at and participant.last_read_at >= message.create_at:
+            read_by.append(participant.user_id)
     return ChatMessageResponse(
         id=message.id,
         conversation_id=message.conversation_id,
@@ -117,59 +149,107 @@ async def _serialize_message(message: ChatMessage) -> ChatMessageResponse:
     )
 
 
-async def _serialize_conversation(
+def _message_cursor(direction: HistoryDirection, message: ChatMessage) -> str:
+    return encode_cursor(direction.value, message.create_at.isoformat(), str(message.id))
+
+
+def _search_cursor(message: ChatMessage, rank: float) -> str:
+    return encode_cursor(rank, message.create_at.isoformat(), str(message.id))
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, datetime, uuid.UUID]:
+    rank, create_at, message_id = decode_cursor(cursor, 3)
+    try:
+        after = (float(rank), datetime.fromisoformat(create_at), uuid.UUID(message_id))
+    except (TypeError, ValueError):
+        raise InvalidCursor()
+    if after[1].tzinfo is None:
+        raise InvalidCursor()
+    return after
+
+
+def _decode_message_cursor(cursor: str) -> tuple[HistoryDirection, tuple[datetime, uuid.UUID]]:
+    direction, create_at, message_id = decode_cursor(cursor, 3)
+    try:
+        anchor = (datetime.fromisoformat(create_at), uuid.UUID(message_id))
+        direction = HistoryDirection(direction)
+    except (TypeError, ValueError):
+        raise InvalidCursor()
+    if anchor[0].tzinfo is None:
+        raise InvalidCursor()
+    return direction, anchor
+
+
+async def _serialize_conversations(
     db: SessionDep,
-    conversation: ChatConversation,
-) -> ChatConversationResponse:
-    participants_result = await db.execute(
-        select(ChatParticipant)
-        .options(selectinload(ChatParticipant.user))
-        .where(ChatParticipant.conversation_id == conversation.id)
-        .order_by(ChatParticipant.create_at.asc())
+    conversations: list[ChatConversation],
+    viewer_id: uuid.UUID,
+) -> list[ChatConversationResponse]:
+    """Serialize conversations whose participants (and users) are already loaded.
+
+    Last messages for the whole batch come from a single query, so the cost
+    does not grow with the number of conversations.
+    """
+    active = [conversation for conversation in conversations if conversation.last_message_at]
+    last_messages = await _chat_service(db).get_last_messages(
+        (conversation.id for conversation in active),
+        since=min((conversation.last_message_at for conversation in active), default=None),
     )
-    participants = [
-        _serialize_participant(participant)
-        for participant in participants_result.scalars().all()
-    ]
 
-    last_message = None
-    if conversation.last_message_at:
-        result = await db.execute(
-            select(ChatMessage)
-            .options(selectinload(ChatMessage.receipts))
-            .where(ChatMessage.conversation_id == conversation.id)
-            .order_by(ChatMessage.create_at.desc())
-            .limit(1)
+    serialized: list[ChatConversationResponse] = []
+    for conversation in conversations:
+        participants = sorted(conversation.participants, key=lambda p: p.create_at)
+        last_message = last_messages.get(conversation.id)
+        unread_count = next(
+            (p.unread_count for p in participants if p.user_id == viewer_id),
+            0,
         )
-        message = result.scalar_one_or_none()
-        if message:
-            last_message = await _serialize_message(message)
-
-    return ChatConversationResponse(
-        id=conversation.id,
-        created_at=conversation.create_at,
-        updated_at=conversation.updated_at,
-        last_message_at=conversation.last_message_at,
-        participants=participants,
-        last_message=last_message,
-    )
+        serialized.append(
+            ChatConversationResponse(
+                id=conversation.id,
+                created_at=conversation.create_at,
+                updated_at=conversation.updated_at,
+                last_message_at=conversation.last_message_at,
+                participants=[_serialize_participant(p) for p in participants],
+                last_message=_serialize_message(last_message, participants) if last_message else None,
+                unread_count=unread_count,
+            )
+        )
+    return serialized
 
 
-async def _user_contact_ids(db: SessionDep, user_id: uuid.UUID) -> set[uuid.UUID]:
-    conversation_stmt = select(ChatParticipant.conversation_id).where(
-        ChatParticipant.user_id == user_id
-    )
-    conversation_result = await db.execute(conversation_stmt)
-    conversation_ids = [row[0] for row in conversation_result.all()]
-    if not conversation_ids:
-        return set()
-
-    contacts_stmt = select(ChatParticipant.user_id).where(
-        ChatParticipant.conversation_id.in_(conversation_ids),
-        ChatParticipant.user_id != user_id,
+async def _serialize_conversation(
+    db: SessionDep,
+    conversation: ChatConversation,
+    viewer_id: uuid.UUID,
+) -> ChatConversationResponse:
+    serialized = await _serialize_conversations(db, [conversation], viewer_id)
+    return serialized[0]
+
+
+async def _broadcast_receipts(participant_ids: Iterable[uuid.UUID],
+                              conversation_id: uuid.UUID,
+                              user_id: uuid.UUID,
+                              status: MessageDeliveryStatus,
+                              up_to: datetime,
+                              up_to_message_id: uuid.UUID
+                              ) -> None:
+    """One ``receipt`` event for a watermark move: every message up to
+    ``up_to`` is now delivered or read, however many there are.
+    """
+    await manager.broadcast(
+        participant_ids,
+        {
+            "type": "receipt",
+            "data": {
+                "conversation_id": str(conversation_id),
+                "status": status.value,
+                "user_id": str(user_id),
+                "up_to": up_to.isoformat(),
+                "up_to_message_id": str(up_to_message_id),
+            },
+        },
     )
-    contacts_result = await db.execute(contacts_stmt)
-    return {row[0] for row in contacts_result.all()}
 
 
 @chat_route.post("/conversations", response_model=ChatConversationResponse, status_code=201)
@@ -188,37 +268,21 @@ async def create_conversation(
     if not recipient:
         raise HTTPException(status_code=404, detail="Recipient not found.")
 
-    participant_a = aliased(ChatParticipant)
-    participant_b = aliased(ChatParticipant)
+    conversation_id, created = await _chat_service(db).get_or_create_direct_conversation(
+        current_user.id,
+        payload.recipient_id,
+    )
+    if created:
+        await db.commit()
 
-    existing_stmt = (
+    result = await db.execute(
         select(ChatConversation)
-        .join(participant_a, participant_a.conversation_id == ChatConversation.id)
-        .join(participant_b, participant_b.conversation_id == ChatConversation.id)
-        .where(participant_a.user_id == current_user.id)
-        .where(participant_b.user_id == payload.recipient_id)
+        .options(*CONVERSATION_RESPONSE_OPTIONS)
+        .where(ChatConversation.id == conversation_id)
     )
-    existing_result = await db.execute(existing_stmt)
-    conversation = existing_result.scalar_one_or_none()
-
-    if conversation:
-        return await _serialize_conversation(db, conversation)
+    conversation = result.scalar_one()
 
-    conversation = ChatConversation()
-    db.add(conversation)
-    await db.flush()
-
-    db.add_all(
-        [
-            ChatParticipant(conversation_id=conversation.id, user_id=current_user.id),
-            ChatParticipant(conversation_id=conversation.id, user_id=payload.recipient_id),
-        ]
-    )
-
-    await db.commit()
-    await db.refresh(conversation)
-
-    return await _serialize_conversation(db, conversation)
+    return await _serialize_conversation(db, conversation, current_user.id)
 
 
 @chat_route.get("/conversations", response_model=list[ChatConversationResponse])
@@ -230,17 +294,78 @@ async def list_conversations(
         select(ChatConversation)
         .join(ChatParticipant)
         .where(ChatParticipant.user_id == current_user.id)
-        .options(
-            selectinload(ChatConversation.participants).selectinload(ChatParticipant.user)
-        )
+        .options(*CONVERSATION_RESPONSE_OPTIONS)
         .order_by(ChatConversation.last_message_at.desc(), ChatConversation.create_at.desc())
     )
     result = await db.execute(stmt)
-    conversations = result.scalars().unique().all()
-    serialized = []
-    for conversation in conversations:
-        serialized.append(await _serialize_conversation(db, conversation))
-    return serialized
+    conversations = list(result.scalars().unique().all())
+    return await _serialize_conversations(db, conversations, current_user.id)
+
+
+@chat_route.get("/unread", response_model=ChatUnreadSummary)
+async def unread_summary(
+    db: SessionDep,
+    current_user: User = Depends(get_current_user),
+) -> ChatUnreadSummary:
+    counts = await _chat_service(db).get_unread_counts(current_user.id)
+    return ChatUnreadSummary(
+        total=sum(counts.values()),
+        conversations=[
+            ChatUnreadConversation(conversation_id=conversation_id, unread_count=count)
+            for conversation_id, count in counts.items()
+        ],
+    )
+
+
+@chat_route.get("/sync", response_model=ChatSyncResponse)
+async def sync_changes(
+    db: SessionDep,
+    current_user: User = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int = Query(default=200, ge=1, le=settings.CHAT_SYNC_MAX_CHANGES),
+) -> ChatSyncResponse:
+    """Everything that changed in the user's conversations since ``cursor``.
+
+    Without a cursor the stream starts from the beginning. Changes are only
+    ever repeated, never skipped: clients apply them by id and keep calling
+    with the returned cursor while ``has_more`` is set.
+    """
+    after_seq = 0
+    if cursor is not None:
+        (after_seq,) = decode_cursor(cursor, 1)
+        if not isinstance(after_seq, int) or after_seq < 0:
+            raise InvalidCursor()
+
+    changes = await _chat_service(db).get_changes(
+        current_user.id,
+        after_seq,
+        limit,
+        settled_before=time_now() - timedelta(seconds=settings.CHAT_SYNC_SETTLE_SECONDS),
+    )
+    conversations: dict[uuid.UUID, ChatConversation] = {}
+    if changes.conversation_ids:
+        result = await db.execute(
+            select(ChatConversation)
+            .where(ChatConversation.id.in_(changes.conversation_ids))
+            .options(*CONVERSATION_RESPONSE_OPTIONS)
+        )
+        conversations = {conversation.id: conversation for conversation in result.scalars()}
+
+    return ChatSyncResponse(
+        cursor=encode_cursor(changes.next_seq),
+        has_more=changes.has_more,
+        conversations=await _serialize_conversations(
+            db,
+            # A conversation deleted since the changes were read drops out.
+            [conversations[cid] for cid in changes.conversation_ids if cid in conversations],
+            current_user.id,
+        ),
+        messages=[
+            _serialize_message(message, conversations[message.conversation_id].participants)
+            for message in changes.messages
+            if message.conversation_id in conversations
+        ],
+    )
 
 
 @chat_route.get(
@@ -249,51 +374,119 @@ async def list_conversations(
 )
 async def list_messages(
     conversation_id: uuid.UUID,
+    response: Response,
     db: SessionDep,
     current_user: User = Depends(get_current_user),
+    cursor: str | None = None,
+    around: uuid.UUID | None = None,
     before: datetime | None = None,
-    limit: int = 50,
+    limit: int = Query(default=50, ge=1, le=100),
 ) -> list[ChatMessageResponse]:
-    if limit > 100:
-        raise HTTPException(status_code=400, detail="Limit cannot exceed 100.")
+    """History page, oldest first.
+
+    Without arguments returns the latest messages. ``X-Prev-Cursor`` /
+    ``X-Next-Cursor`` page towards older / newer messages when there are any;
+    ``around`` centres the page on one message. ``before`` is the older
+    timestamp-only form of the older-direction cursor.
+    """
+    if sum(arg is not None for arg in (cursor, around, before)) > 1:
+        raise HTTPException(status_code=400, detail="Use only one of cursor, around and before.")
 
     service = _chat_service(db)
     await service.get_conversation(conversation_id)
-    await service.ensure_participant(conversation_id, current_user.id)
-
-    stmt = (
-        select(ChatMessage)
-        .options(selectinload(ChatMessage.receipts))
-        .where(ChatMessage.conversation_id == conversation_id)
-        .order_by(ChatMessage.create_at.desc())
-        .limit(limit)
-    )
-    if before:
-        stmt = stmt.where(ChatMessage.create_at < before)
-
-    result = await db.execute(stmt)
-    messages = list(result.scalars().all())
-    messages.reverse()
-    updated_ids = await service.mark_messages_delivered(messages, current_user.id)
-    if updated_ids:
+    participants = await service.get_participants(conversation_id)
+    viewer = next((p for p in participants if p.user_id == current_user.id), None)
+    if viewer is None:
+        raise ConversationAccessForbidden()
+
+    if around is not None:
+        anchor_message = await service.load_message(around)
+        if anchor_message.conversation_id != conversation_id:
+            raise MessageNotFound()
+        anchor = (anchor_message.create_at, anchor_message.id)
+        older, has_older = await service.get_message_page(conversation_id, limit // 2, anchor=anchor)
+        newer, has_newer = await service.get_message_page(
+            conversation_id,
+            limit - limit // 2,
+            anchor=anchor,
+            newer=True,
+            inclusive=True,
+        )
+        messages = older + newer
+    elif cursor is not None:
+        direction, anchor = _decode_message_cursor(cursor)
+        if direction is HistoryDirection.NEWER:
+            messages, has_newer = await service.get_message_page(conversation_id, limit, anchor=anchor, newer=True)
+            has_older = True
+        else:
+            messages, has_older = await service.get_message_page(conversation_id, limit, anchor=anchor)
+            has_newer = True
+    else:
+        # Nothing sorts below the nil UUID, so this is plain "create_at < before".
+        anchor = (before, uuid.UUID(int=0)) if before is not None else None
+        messages, has_older = await service.get_message_page(conversation_id, limit, anchor=anchor)
+        has_newer = before is not None
+
+    if messages and has_older:
+        response.headers[PREV_CURSOR_HEADER] = _message_cursor(HistoryDirection.OLDER, messages[0])
+    if messages and has_newer:
+        response.headers[NEXT_CURSOR_HEADER] = _message_cursor(HistoryDirection.NEWER, messages[-1])
+
+    delivered_up_to = await service.mark_messages_delivered(messages, viewer)
+    if delivered_up_to is not None:
         await db.commit()
-        participant_ids = await service.get_participant_ids(conversation_id)
-        receipt_payload = {
-            "type": "receipt",
-            "data": {
-                "message_ids": [str(mid) for mid in updated_ids],
-                "status": MessageDeliveryStatus.DELIVERED.value,
-                "user_id": str(current_user.id),
-            },
-        }
-        await manager.broadcast(participant_ids, receipt_payload)
+        await _broadcast_receipts(
+            [p.user_id for p in participants],
+            conversation_id,
+            current_user.id,
+            MessageDeliveryStatus.DELIVERED,
+            delivered_up_to.create_at,
+            delivered_up_to.id,
+        )
 
     serialized: list[ChatMessageResponse] = []
     for message in messages:
-        serialized.append(await _serialize_message(message))
+        serialized.append(_serialize_message(message, participants))
     return serialized
 
 
+@chat_route.get(
+    "/conversations/{conversation_id}/search",
+    response_model=list[ChatMessageResponse],
+)
+async def search_messages(
+    conversation_id: uuid.UUID,
+    q: str,
+    response: Response,
+    db: SessionDep,
+    current_user: User = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[ChatMessageResponse]:
+    """Messages matching ``q``, best match first.
+
+    Matching ignores case and Vietnamese accents. ``X-Next-Cursor`` is set
+    while more results follow.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query cannot be empty.")
+    if len(q) > 200:
+        raise HTTPException(status_code=400, detail="Search query is too long.")
+    after = _decode_search_cursor(cursor) if cursor is not None else None
+
+    service = _chat_service(db)
+    await service.get_conversation(conversation_id)
+    await service.ensure_participant(conversation_id, current_user.id)
+
+    results, has_more = await service.search_messages(conversation_id, q, limit, after=after)
+    if results and has_more:
+        response.headers[NEXT_CURSOR_HEADER] = _search_cursor(*results[-1])
+
+    participants = await service.get_participants(conversation_id)
+    return [_serialize_message(message, participants) for message, _ in results]
+
+
 @chat_route.post(
     "/conversations/{conversation_id}/messages",
     response_model=ChatMessageResponse,
@@ -309,21 +502,18 @@ async def send_message(
     await rate_limiter.hit(current_user.id)
 
     service = _chat_service(db)
-    conversation = await service.get_conversation(conversation_id)
-    await service.ensure_participant(conversation_id, current_user.id)
-    participant_ids = await service.get_participant_ids(conversation_id)
+    await service.get_conversation(conversation_id)
+    participant_ids = await membership_cache.ensure_member(db, conversation_id, current_user.id)
 
     message = await service.create_message(
-        conversation,
+        conversation_id,
         current_user.id,
         content=payload.content.strip(),
-        recipient_ids=participant_ids,
     )
 
     await db.commit()
-    await db.refresh(message, attribute_names=["receipts"])
 
-    response = await _serialize_message(message)
+    response = _serialize_message(message)
     await manager.broadcast(
         participant_ids,
         {
@@ -354,28 +544,25 @@ async def acknowledge_message(
     current_user: User = Depends(get_current_user),
 ) -> ChatMessageResponse:
     service = _chat_service(db)
-    message = await service.acknowledge_message(
+    message, advanced = await service.acknowledge_message(
         message_id,
         current_user.id,
         payload.status,
     )
 
     await db.commit()
-    await db.refresh(message, attribute_names=["receipts"])
 
-    response = await _serialize_message(message)
-    participant_ids = await service.get_participant_ids(message.conversation_id)
-    await manager.broadcast(
-        participant_ids,
-        {
-            "type": "receipt",
-            "data": {
-                "message_ids": [str(message.id)],
-                "status": payload.status.value,
-                "user_id": str(current_user.id),
-            },
-        },
-    )
+    participants = await service.get_participants(message.conversation_id)
+    response = _serialize_message(message, participants)
+    if advanced:
+        await _broadcast_receipts(
+            [p.user_id for p in participants],
+            message.conversation_id,
+            current_user.id,
+            payload.status,
+            message.create_at,
+            message.id,
+        )
     logger.info(
         "chat.message.acknowledged",
         extra={
@@ -383,11 +570,61 @@ async def acknowledge_message(
             "conversation_id": str(message.conversation_id),
             "user_id": str(current_user.id),
             "status": payload.status.value,
+            "advanced": advanced,
         },
     )
     return response
 
 
+@chat_route.post(
+    "/conversations/{conversation_id}/ack",
+    response_model=ChatAcknowledgeResponse,
+)
+async def acknowledge_conversation(
+    conversation_id: uuid.UUID,
+    payload: ChatConversationAcknowledge,
+    db: SessionDep,
+    current_user: User = Depends(get_current_user),
+) -> ChatAcknowledgeResponse:
+    service = _chat_service(db)
+    await service.get_conversation(conversation_id)
+    participant, acknowledgement = await service.acknowledge_conversation(
+        conversation_id,
+        current_user.id,
+        payload.status,
+        payload.up_to_message_id,
+    )
+
+    await db.commit()
+
+    if acknowledgement is not None and acknowledgement.advanced:
+        participant_ids = await membership_cache.get_participant_ids(db, conversation_id)
+        await _broadcast_receipts(
+            participant_ids,
+            conversation_id,
+            current_user.id,
+            payload.status,
+            acknowledgement.up_to,
+            acknowledgement.up_to_message_id,
+        )
+    logger.info(
+        "chat.conversation.acknowledged",
+        extra={
+            "conversation_id": str(conversation_id),
+            "user_id": str(current_user.id),
+            "status": payload.status.value,
+            "advanced": acknowledgement is not None and acknowledgement.advanced,
+        },
+    )
+    return ChatAcknowledgeResponse(
+        conversation_id=conversation_id,
+        status=payload.status,
+        up_to=acknowledgement.up_to if acknowledgement else None,
+        up_to_message_id=acknowledgement.up_to_message_id if acknowledgement else None,
+        unread_count=participant.unread_count,
+    )
+
+
 @chat_route.post(
     "/conversations/{conversation_id}/attachments",
     response_model=ChatMessageResponse,
@@ -403,8 +640,8 @@ async def upload_attachment(
     await rate_limiter.hit(current_user.id)
 
     service = _chat_service(db)
-    conversation = await service.get_conversation(conversation_id)
-    await service.ensure_participant(conversation_id, current_user.id)
+    await service.get_conversation(conversation_id)
+    participant_ids = await membership_cache.ensure_member(db, conversation_id, current_user.id)
 
     file_bytes = await file.read()
     if not file_bytes:
@@ -428,23 +665,19 @@ async def upload_attachment(
     if not uploaded_key:
         raise AttachmentUploadFailed()
 
-    participant_ids = await service.get_participant_ids(conversation_id)
-
     message = await service.create_message(
-        conversation,
+        conversation_id,
         current_user.id,
         content=caption_text,
         attachment_name=file.filename,
         attachment_key=uploaded_key,
         attachment_content_type=file.content_type,
         attachment_size=len(file_bytes),
-        recipient_ids=participant_ids,
     )
 
     await db.commit()
-    await db.refresh(message, attribute_names=["receipts"])
 
-    response = await _serialize_message(message)
+    response = _serialize_message(message)
     await manager.broadcast(
         participant_ids,
         {
@@ -466,253 +699,277 @@ async def upload_attachment(
     return response
 
 
+async def _ws_send_error(websocket: WebSocket, message: str, **extra: object) -> None:
+    await manager.send_to_socket(websocket, {"type": "error", "message": message, **extra})
+
+
+async def _ws_handle_message(db: SessionDep,
+                             websocket: WebSocket,
+                             user_id: uuid.UUID,
+                             message_payload: dict,
+                             contacts: set[uuid.UUID],
+                             memberships: ConnectionMembership
+                             ) -> None:
+    conversation_id_raw = message_payload.get("conversation_id")
+    content = (message_payload.get("content") or "").strip()
+
+    try:
+        conversation_uuid = uuid.UUID(conversation_id_raw)
+    except (ValueError, TypeError):
+        await _ws_send_error(websocket, "Invalid conversation id.")
+        return
+
+    try:
+        validate_message_content(content)
+    except HTTPException as exc:
+        await _ws_send_error(websocket, exc.detail)
+        return
+
+    try:
+        await rate_limiter.hit(user_id)
+    except RateLimitExceeded as exc:
+        await _ws_send_error(websocket, exc.detail, retry_after=int(exc.headers["Retry-After"]))
+        return
+
+    try:
+        participant_ids = await memberships.ensure_member(db, conversation_uuid, user_id)
+    except ConversationAccessForbidden:
+        await _ws_send_error(websocket, "You are not a member of this conversation.")
+        return
+    contacts.update(pid for pid in participant_ids if pid != user_id)
+
+    service = _chat_service(db)
+    message = await service.create_message(
+        conversation_uuid,
+        user_id,
+        content=content,
+    )
+
+    await db.commit()
+
+    response = _serialize_message(message)
+    await manager.broadcast(
+        participant_ids,
+        {
+            "type": "message",
+            "data": response.model_dump(),
+        },
+    )
+    logger.info(
+        "chat.message.sent",
+        extra={
+            "conversation_id": str(conversation_uuid),
+            "message_id": str(message.id),
+            "sender_id": str(user_id),
+            "has_attachment": bool(message.attachment_key),
+        },
+    )
+
+
+async def _ws_handle_typing(db: SessionDep,
+                            websocket: WebSocket,
+                            user_id: uuid.UUID,
+                            message_payload: dict,
+                            contacts: set[uuid.UUID],
+                            memberships: ConnectionMembership
+                            ) -> None:
+    conversation_id_raw = message_payload.get("conversation_id")
+    is_typing = bool(message_payload.get("is_typing", True))
+    try:
+        conversation_uuid = uuid.UUID(conversation_id_raw)
+    except (ValueError, TypeError):
+        await _ws_send_error(websocket, "Invalid conversation id.")
+        return
+
+    try:
+        participant_ids = await memberships.ensure_member(db, conversation_uuid, user_id)
+    except ConversationAccessForbidden:
+        await _ws_send_error(websocket, "You are not a member of this conversation.")
+        return
+
+    await manager.broadcast(
+        participant_ids,
+        {
+            "type": "typing",
+            "data": {
+                "conversation_id": str(conversation_uuid),
+                "user_id": str(user_id),
+                "is_typing": is_typing,
+            },
+        },
+    )
+
+
+async def _ws_handle_ack(db: SessionDep,
+                         websocket: WebSocket,
+                         user_id: uuid.UUID,
+                         message_payload: dict,
+                         contacts: set[uuid.UUID],
+                         memberships: ConnectionMembership
+                         ) -> None:
+    # {"message_id": ...} acknowledges one message (and everything before it);
+    # {"conversation_id": ..., "up_to_message_id"?: ...} a whole conversation.
+    message_id_raw = message_payload.get("message_id")
+    conversation_id_raw = message_payload.get("conversation_id")
+    up_to_raw = message_payload.get("up_to_message_id")
+    try:
+        status = MessageDeliveryStatus(message_payload.get("status"))
+        message_uuid = uuid.UUID(message_id_raw) if message_id_raw else None
+        conversation_uuid = uuid.UUID(conversation_id_raw) if conversation_id_raw else None
+        up_to_uuid = uuid.UUID(up_to_raw) if up_to_raw else None
+    except (ValueError, TypeError, AttributeError):
+        await _ws_send_error(websocket, "Invalid acknowledgement payload.")
+        return
+    if message_uuid is None and conversation_uuid is None:
+        await _ws_send_error(websocket, "Invalid acknowledgement payload.")
+        return
+
+    service = _chat_service(db)
+    try:
+        if message_uuid is not None:
+            message, advanced = await service.acknowledge_message(message_uuid, user_id, status)
+            conversation_uuid = message.conversation_id
+            acknowledgement = ChatAcknowledgement(up_to=message.create_at, up_to_message_id=message.id, advanced=advanced)
+        else:
+            _, acknowledgement = await service.acknowledge_conversation(
+                conversation_uuid,
+                user_id,
+                status,
+                up_to_uuid,
+            )
+    except HTTPException as exc:
+        await _ws_send_error(websocket, exc.detail)
+        return
+    await db.commit()
+
+    advanced = acknowledgement is not None and acknowledgement.advanced
+    if advanced:
+        participant_ids = await memberships.ensure_member(db, conversation_uuid, user_id)
+        await _broadcast_receipts(
+            participant_ids,
+            conversation_uuid,
+            user_id,
+            status,
+            acknowledgement.up_to,
+            acknowledgement.up_to_message_id,
+        )
+    logger.info(
+        "chat.message.acknowledged",
+        extra={
+            "message_id": str(message_uuid) if message_uuid else None,
+            "conversation_id": str(conversation_uuid),
+            "user_id": str(user_id),
+            "status": status.value,
+            "advanced": advanced,
+        },
+    )
+
+
+_WS_EVENT_HANDLERS = {
+    "message": _ws_handle_message,
+    "typing": _ws_handle_typing,
+    "ack": _ws_handle_ack,
+}
+
+
+async def _ws_receive(websocket: WebSocket) -> str | bytes:
+    """Next text or binary frame; ``receive_text`` rejects binary ones."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    if message.get("text") is not None:
+        return message["text"]
+    return message.get("bytes") or b""
+
+
+def _parse_capabilities(raw: str | None) -> frozenset[WebSocketCapability]:
+    requested = {item.strip() for item in (raw or "").split(",")}
+    return frozenset(capability for capability in WebSocketCapability if capability.value in requested)
+
+
 @chat_route.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, token: str | None = None) -> None:
+async def websocket_endpoint(websocket: WebSocket,
+                             token: str | None = None,
+                             capabilities: str | None = None
+                             ) -> None:
+    """Realtime chat socket. ``capabilities`` is a comma-separated opt-in list
+    (see ``WebSocketCapability``); unknown entries are ignored. Clients pick
+    the wire encoding by offering ``WebSocketEncoding`` subprotocols.
+    """
     if not token:
         await websocket.close(code=4401)
         return
 
-    async with SessionLocal() as db:
-        try:
-            payload = decode_token(token)
-        except InvalidToken:
-            await websocket.close(code=4403)
-            return
+    try:
+        payload = decode_token(token)
+    except InvalidToken:
+        await websocket.close(code=4403)
+        return
 
-        if not payload or payload.get("type") != "access":
-            await websocket.close(code=4403)
-            return
+    if not payload or payload.get("type") != "access":
+        await websocket.close(code=4403)
+        return
 
-        email = payload.get("sub")
-        if not email:
-            await websocket.close(code=4403)
-            return
+    email = payload.get("sub")
+    if not email:
+        await websocket.close(code=4403)
+        return
 
+    # Sessions are borrowed per step and returned to the pool right away, so an
+    # idle socket never pins a database connection.
+    async with SessionLocal() as db:
         result = await db.execute(select(User).where(User.email == email.lower()))
         user = result.scalar_one_or_none()
-        if not user:
-            await websocket.close(code=4403)
-            return
-
-        await websocket.accept()
-        await manager.connect(user.id, websocket)
-
-        service = _chat_service(db)
-        contacts = await _user_contact_ids(db, user.id)
-        now = time_now()
-        await manager.broadcast(
-            contacts,
-            {
-                "type": "presence",
-                "data": {
-                    "user_id": str(user.id),
-                    "status": "online",
-                    "last_seen_at": now.isoformat(),
-                },
-            },
-        )
+        contacts = set(await presence.get_contact_ids(db, user.id)) if user else set()
 
-        try:
-            while True:
-                data = await websocket.receive_text()
-                try:
-                    message_payload = json.loads(data)
-                except json.JSONDecodeError:
-                    await websocket.send_text(
-                        json.dumps(
-                            {
-                                "type": "error",
-                                "message": "Invalid JSON payload.",
-                            }
-                        )
-                    )
-                    continue
+    if not user:
+        await websocket.close(code=4403)
+        return
+
+    user_id = user.id
+    memberships = membership_cache.connection_view()
+    encoding = negotiate_encoding(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=encoding.value if encoding else None)
+    await presence.connect(
+        user_id,
+        websocket,
+        contacts,
+        _parse_capabilities(capabilities),
+        encoding or WebSocketEncoding.JSON,
+    )
 
+    try:
+        while True:
+            data = await _ws_receive(websocket)
+            manager.touch(websocket)
+            try:
+                message_payload = decode(data)
+            except ValueError:
+                await _ws_send_error(
+                    websocket,
+                    "Invalid JSON payload." if isinstance(data, str) else "Invalid msgpack payload.",
+                )
+                continue
+
+            handler = None
+            if isinstance(message_payload, dict):
                 event_type = message_payload.get("type")
-                if event_type == "message":
-                    conversation_id_raw = message_payload.get("conversation_id")
-                    content = (message_payload.get("content") or "").strip()
-
-                    try:
-                        conversation_uuid = uuid.UUID(conversation_id_raw)
-                    except (ValueError, TypeError):
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": "Invalid conversation id.",
-                                }
-                            )
-                        )
-                        continue
-
-                    try:
-                        validate_message_content(content)
-                    except HTTPException as exc:
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": exc.detail,
-                                }
-                            )
-                        )
-                        continue
-
-                    await rate_limiter.hit(user.id)
-
-                    try:
-                        conversation = await service.get_conversation(conversation_uuid)
-                        await service.ensure_participant(conversation_uuid, user.id)
-                    except ConversationAccessForbidden:
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": "You are not a member of this conversation.",
-                                }
-                            )
-                        )
-                        continue
-
-                    participant_ids = await service.get_participant_ids(conversation_uuid)
-                    contacts.update(pid for pid in participant_ids if pid != user.id)
-
-                    message = await service.create_message(
-                        conversation,
-                        user.id,
-                        content=content,
-                        recipient_ids=participant_ids,
-                    )
-
-                    await db.commit()
-                    await db.refresh(message, attribute_names=["receipts"])
-
-                    response = await _serialize_message(message)
-                    await manager.broadcast(
-                        participant_ids,
-                        {
-                            "type": "message",
-                            "data": response.model_dump(),
-                        },
-                    )
-                    logger.info(
-                        "chat.message.sent",
-                        extra={
-                            "conversation_id": str(conversation_uuid),
-                            "message_id": str(message.id),
-                            "sender_id": str(user.id),
-                            "has_attachment": bool(message.attachment_key),
-                        },
-                    )
-                elif event_type == "typing":
-                    conversation_id_raw = message_payload.get("conversation_id")
-                    is_typing = bool(message_payload.get("is_typing", True))
-                    try:
-                        conversation_uuid = uuid.UUID(conversation_id_raw)
-                    except (ValueError, TypeError):
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": "Invalid conversation id.",
-                                }
-                            )
-                        )
-                        continue
-
-                    try:
-                        await service.ensure_participant(conversation_uuid, user.id)
-                    except ConversationAccessForbidden:
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": "You are not a member of this conversation.",
-                                }
-                            )
-                        )
-                        continue
-
-                    participant_ids = await service.get_participant_ids(conversation_uuid)
-                    await manager.broadcast(
-                        participant_ids,
-                        {
-                            "type": "typing",
-                            "data": {
-                                "conversation_id": str(conversation_uuid),
-                                "user_id": str(user.id),
-                                "is_typing": is_typing,
-                            },
-                        },
-                    )
-                elif event_type == "ack":
-                    message_id_raw = message_payload.get("message_id")
-                    status_raw = message_payload.get("status")
-                    try:
-                        message_uuid = uuid.UUID(message_id_raw)
-                        status = MessageDeliveryStatus(status_raw)
-                    except (ValueError, TypeError):
-                        await websocket.send_text(
-                            json.dumps(
-                                {
-                                    "type": "error",
-                                    "message": "Invalid acknowledgement payload.",
-                                }
-                            )
-                        )
-                        continue
-
-                    message = await service.acknowledge_message(
-                        message_uuid,
-                        user.id,
-                        status,
-                    )
-                    await db.commit()
-                    await db.refresh(message, attribute_names=["receipts"])
-                    participant_ids = await service.get_participant_ids(message.conversation_id)
-                    await manager.broadcast(
-                        participant_ids,
-                        {
-                            "type": "receipt",
-                            "data": {
-                                "message_ids": [str(message.id)],
-                                "status": status.value,
-                                "user_id": str(user.id),
-                            },
-                        },
-                    )
-                    logger.info(
-                        "chat.message.acknowledged",
-                        extra={
-                            "message_id": str(message.id),
-                            "conversation_id": str(message.conversation_id),
-                            "user_id": str(user.id),
-                            "status": status.value,
-                        },
-                    )
-                else:
-                    await websocket.send_text(
-                        json.dumps(
-                            {
-                                "type": "error",
-                                "message": "Unsupported event type.",
-                            }
-                        )
-                    )
-        except WebSocketDisconnect:
-            pass
-        finally:
-            await manager.disconnect(user.id, websocket)
-            last_seen = await manager.get_last_seen(user.id)
-            await manager.broadcast(
-                contacts,
-                {
-                    "type": "presence",
-                    "data": {
-                        "user_id": str(user.id),
-                        "status": "offline",
-                        "last_seen_at": (last_seen or time_now()).isoformat(),
-                    },
-                },
-            )
\ No newline at end of file
+                # Keepalive frames only prove the client is there.
+                if event_type == "pong":
+                    continue
+                if event_type == "ping":
+                    await manager.send_to_socket(websocket, {"type": "pong"})
+                    continue
+                handler = _WS_EVENT_HANDLERS.get(event_type)
+            if handler is None:
+                await _ws_send_error(websocket, "Unsupported event type.")
+                continue
+
+            # Sessions connect lazily: a typing event on a cached membership
+            # never checks out a connection.
+            async with SessionLocal() as db:
+                await handler(db, websocket, user_id, message_payload, contacts, memberships)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await presence.disconnect(user_id, websocket, contacts)
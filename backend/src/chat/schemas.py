@@ -19,6 +19,7 @@ class ChatParticipantResponse(BaseModel):
     conversation_id: uuid.UUID
     user: ChatUserSummary
     joined_at: datetime
+    last_delivered_at: Optional[datetime] = None
     last_read_at: Optional[datetime] = None
 
     class Config:
@@ -49,11 +50,30 @@ class ChatConversationResponse(BaseModel):
     last_message_at: Optional[datetime] = None
     participants: list[ChatParticipantResponse]
     last_message: Optional[ChatMessageResponse] = None
+    unread_count: int = 0
 
     class Config:
         from_attributes = True
 
 
+class ChatUnreadConversation(BaseModel):
+    conversation_id: uuid.UUID
+    unread_count: int
+
+
+class ChatUnreadSummary(BaseModel):
+    total: int
+    conversations: list[ChatUnreadConversation]
+
+
+class ChatSyncResponse(BaseModel):
+    # Pass back as ``cursor`` on the next sync.
+    cursor: str
+    has_more: bool
+    conversations: list[ChatConversationResponse]
+    messages: list[ChatMessageResponse]
+
+
 class ChatConversationCreate(BaseModel):
     recipient_id: uuid.UUID
 
@@ -68,4 +88,19 @@ class MessageDeliveryStatus(str, Enum):
 
 
 class ChatMessageAcknowledge(BaseModel):
-    status: MessageDeliveryStatus
\ No newline at end of file
+    status: MessageDeliveryStatus
+
+
+class ChatConversationAcknowledge(BaseModel):
+    status: MessageDeliveryStatus = MessageDeliveryStatus.READ
+    # Everything up to and including this message; the latest one if omitted.
+    up_to_message_id: Optional[uuid.UUID] = None
+
+
+class ChatAcknowledgeResponse(BaseModel):
+    conversation_id: uuid.UUID
+    status: MessageDeliveryStatus
+    # The watermark: every message up to this one; None in an empty conversation.
+    up_to: Optional[datetime] = None
+    up_to_message_id: Optional[uuid.UUID] = None
+    unread_count: int
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import uuid
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 
-from sqlalchemy import select
+from sqlalchemy import DateTime, Float, cast, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from src.chat.exceptions import (
     ConversationAccessForbidden,
@@ -14,15 +16,36 @@ from src.chat.exceptions import (
     MessageNotFound,
 )
 from src.chat.models import (
+    MESSAGE_SEARCH_CONFIG,
     ChatConversation,
     ChatMessage,
-    ChatMessageReceipt,
     ChatParticipant,
 )
 from src.chat.schemas import MessageDeliveryStatus
 from src.core.base_model import time_now
 
 
+@dataclass
+class ChatAcknowledgement:
+    """Where an ack put a watermark: every message up to ``up_to``."""
+
+    up_to: datetime
+    up_to_message_id: uuid.UUID
+    # False when the watermark was already there and nothing changed.
+    advanced: bool
+
+
+@dataclass
+class ChatChanges:
+    """One bounded slice of a user's chat change stream."""
+
+    messages: list[ChatMessage] = field(default_factory=list)
+    # Conversations with new messages or changed participants, in stream order.
+    conversation_ids: list[uuid.UUID] = field(default_factory=list)
+    next_seq: int = 0
+    has_more: bool = False
+
+
 class ChatService:
     def __init__(self, db: AsyncSession) -> None:
         self.db = db
@@ -38,6 +61,59 @@ class ChatService:
         return conversation
 
 
+    async def get_or_create_direct_conversation(self,
+                                                user_id: uuid.UUID,
+                                                other_user_id: uuid.UUID
+                                                ) -> tuple[uuid.UUID, bool]:
+        """Id of the one-to-one conversation between two users, and whether it is new.
+
+        The sorted pair of user ids is a unique key, so finding the
+        conversation is one index probe. Creating it is an INSERT ... ON
+        CONFLICT DO NOTHING: of two concurrent calls, one inserts and the
+        other waits for it and then finds its row. Caller commits.
+        """
+        low_id, high_id = sorted((user_id, other_user_id))
+        pair = (
+            ChatConversation.direct_user_low_id == low_id,
+            ChatConversation.direct_user_high_id == high_id,
+        )
+        result = await self.db.execute(select(ChatConversation.id).where(*pair))
+        conversation_id = result.scalar_one_or_none()
+        if conversation_id is not None:
+            return conversation_id, False
+
+        now = time_now()
+        stmt = (
+            pg_insert(ChatConversation)
+            .values(
+                id=uuid.uuid4(),
+                direct_user_low_id=low_id,
+                direct_user_high_id=high_id,
+                create_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[ChatConversation.direct_user_low_id, ChatConversation.direct_user_high_id],
+            )
+            .returning(ChatConversation.id)
+        )
+        result = await self.db.execute(stmt)
+        conversation_id = result.scalar_one_or_none()
+        if conversation_id is None:
+            result = await self.db.execute(select(ChatConversation.id).where(*pair))
+            return result.scalar_one(), False
+
+        # Added through the ORM so the membership cache hears about them.
+        self.db.add_all(
+            [
+                ChatParticipant(conversation_id=conversation_id, user_id=user_id),
+                ChatParticipant(conversation_id=conversation_id, user_id=other_user_id),
+            ]
+        )
+        await self.db.flush()
+        return conversation_id, True
+
+
     async def ensure_participant(self,
                                  conversation_id: uuid.UUID,
                                  user_id: uuid.UUID
@@ -61,112 +137,405 @@ class ChatService:
         return [row[0] for row in result.all()]
 
 
+    async def get_participants(self, conversation_id: uuid.UUID) -> list[ChatParticipant]:
+        """Participants with their receipt watermarks, for serializing messages."""
+        result = await self.db.execute(
+            select(ChatParticipant).where(ChatParticipant.conversation_id == conversation_id)
+        )
+        return list(result.scalars().all())
+
+
+    async def get_last_messages(self,
+                                conversation_ids: Iterable[uuid.UUID],
+                                *,
+                                since: datetime | None = None
+                                ) -> dict[uuid.UUID, ChatMessage]:
+        """Latest message of each conversation in a single query.
+
+        ``since``, the oldest ``last_message_at`` among the conversations,
+        lets Postgres skip the monthly partitions before it.
+        """
+        conversation_ids = list(conversation_ids)
+        if not conversation_ids:
+            return {}
+
+        stmt = (
+            select(ChatMessage)
+            .where(ChatMessage.conversation_id.in_(conversation_ids))
+            .distinct(ChatMessage.conversation_id)
+            .order_by(ChatMessage.conversation_id, ChatMessage.create_at.desc())
+        )
+        if since is not None:
+            stmt = stmt.where(ChatMessage.create_at >= since)
+        result = await self.db.execute(stmt)
+        return {message.conversation_id: message for message in result.scalars().all()}
+
+
+    async def get_message_page(self,
+                               conversation_id: uuid.UUID,
+                               limit: int,
+                               *,
+                               anchor: tuple[datetime, uuid.UUID] | None = None,
+                               newer: bool = False,
+                               inclusive: bool = False
+                               ) -> tuple[list[ChatMessage], bool]:
+        """One keyset page of history, oldest first, and whether more lie beyond it.
+
+        Walks ``(create_at, id)`` away from ``anchor``: towards older messages,
+        or newer ones with ``newer``; ``inclusive`` keeps the anchor itself.
+        Without an anchor the walk starts at the newest (or oldest) message.
+        """
+        key = tuple_(ChatMessage.create_at, ChatMessage.id)
+        stmt = select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+        if newer:
+            if anchor is not None:
+                stmt = stmt.where(key >= anchor if inclusive else key > anchor)
+            stmt = stmt.order_by(ChatMessage.create_at, ChatMessage.id)
+        else:
+            if anchor is not None:
+                stmt = stmt.where(key <= anchor if inclusive else key < anchor)
+            stmt = stmt.order_by(ChatMessage.create_at.desc(), ChatMessage.id.desc())
+
+        result = await self.db.execute(stmt.limit(limit + 1))
+        messages = list(result.scalars().all())
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if not newer:
+            messages.reverse()
+        return messages, has_more
+
+
+    async def search_messages(self,
+                              conversation_id: uuid.UUID,
+                              query: str,
+                              limit: int,
+                              *,
+                              after: tuple[float, datetime, uuid.UUID] | None = None
+                              ) -> tuple[list[tuple[ChatMessage, float]], bool]:
+        """One page of messages matching ``query``, best match first, and whether more follow.
+
+        ``query`` takes web search syntax: quoted phrases, ``or`` and ``-word``.
+        Ties in rank go to the newest message. Pages are keyset-walked on
+        ``(rank, create_at, id)`` from ``after``, the last row of the previous page.
+        """
+        tsquery = func.websearch_to_tsquery(cast(MESSAGE_SEARCH_CONFIG, REGCONFIG), query)
+        rank = func.ts_rank_cd(ChatMessage.search_vector, tsquery)
+        stmt = (
+            select(ChatMessage, rank)
+            .where(
+                ChatMessage.conversation_id == conversation_id,
+                ChatMessage.search_vector.bool_op("@@")(tsquery),
+            )
+            .order_by(rank.desc(), ChatMessage.create_at.desc(), ChatMessage.id.desc())
+        )
+        if after is not None:
+            after_rank, after_create_at, after_id = after
+            stmt = stmt.where(
+                tuple_(rank, ChatMessage.create_at, ChatMessage.id)
+                < tuple_(literal(after_rank, Float), after_create_at, after_id)
+            )
+
+        result = await self.db.execute(stmt.limit(limit + 1))
+        rows = [(message, message_rank) for message, message_rank in result.all()]
+        return rows[:limit], len(rows) > limit
+
+
     async def create_message(self,
-                             conversation: ChatConversation,
+                             conversation_id: uuid.UUID,
                              sender_id: uuid.UUID,
                              *,
                              content: str | None,
                              attachment_name: str | None = None,
                              attachment_key: str | None = None,
                              attachment_content_type: str | None = None,
-                             attachment_size: int | None = None,
-                             recipient_ids: Iterable[uuid.UUID]
+                             attachment_size: int | None = None
                              ) -> ChatMessage:
-        message = ChatMessage(
-            conversation_id=conversation.id,
-            sender_id=sender_id,
-            content=content,
-            attachment_name=attachment_name,
-            attachment_key=attachment_key,
-            attachment_content_type=attachment_content_type,
-            attachment_size=attachment_size,
-        )
-        conversation.last_message_at = time_now()
-        self.db.add(message)
-        await self.db.flush()
-        await self._create_receipts(message, recipient_ids)
-        return message
+        """Insert a message in a single round trip.
 
-
-    async def _create_receipts(self,
-                               message: ChatMessage,
-                               recipient_ids: Iterable[uuid.UUID]
-                               ) -> None:
-        for user_id in recipient_ids:
-            if user_id == message.sender_id:
-                continue
-            receipt = ChatMessageReceipt(
-                message_id=message.id,
-                user_id=user_id,
+        One statement inserts the message, bumps the other participants'
+        unread counters and the conversation's ``last_message_at``; the
+        message comes back from ``RETURNING``.
+        """
+        now = time_now()
+        # The UPDATE holds the conversation row lock until commit, so the next
+        # sender here waits for it and then stamps a later time: ``create_at``
+        # rises in commit order within a conversation. Receipt watermarks rely
+        # on this; with the app clock a message committed late could appear
+        # behind one already read and be counted as read unseen.
+        touch_conversation = (
+            update(ChatConversation)
+            .where(ChatConversation.id == conversation_id)
+            .values(
+                last_message_at=func.greatest(
+                    func.clock_timestamp(),
+                    ChatConversation.last_message_at + timedelta(microseconds=1),
+                ),
+                updated_at=literal(now, DateTime(timezone=True)),
             )
-            self.db.add(receipt)
-        await self.db.flush()
+            .returning(ChatConversation.last_message_at)
+            .cte("touch_conversation")
+        )
+        created_at = select(touch_conversation.c.last_message_at).scalar_subquery()
+        new_message = (
+            insert(ChatMessage)
+            .values(
+                id=uuid.uuid4(),
+                conversation_id=conversation_id,
+                sender_id=sender_id,
+                content=content,
+                attachment_name=attachment_name,
+                attachment_key=attachment_key,
+                attachment_content_type=attachment_content_type,
+                attachment_size=attachment_size,
+                create_at=created_at,
+                updated_at=created_at,
+            )
+            .returning(*(column for column in ChatMessage.__table__.c if column.key != "search_vector"))
+            .cte("new_message")
+        )
+        # Explicit timestamps: two UPDATEs in one statement cannot share the
+        # bind parameter SQLAlchemy generates for the ``updated_at`` onupdate.
+        bump_unread = (
+            update(ChatParticipant)
+            .where(
+                ChatParticipant.conversation_id == conversation_id,
+                ChatParticipant.user_id != sender_id,
+            )
+            .values(
+                unread_count=ChatParticipant.unread_count + 1,
+                updated_at=literal(now, DateTime(timezone=True)),
+            )
+            .cte("bump_unread")
+        )
 
+        stmt = select(ChatMessage).from_statement(
+            select(new_message).add_cte(bump_unread)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+
+    async def advance_watermarks(self,
+                                 conversation_id: uuid.UUID,
+                                 user_id: uuid.UUID,
+                                 status: MessageDeliveryStatus,
+                                 up_to: datetime
+                                 ) -> ChatParticipant | None:
+        """Mark every message up to ``up_to`` as delivered, or read, for ``user_id``.
+
+        Watermarks only move forward, and a read implies delivery. Reading
+        recomputes the unread counter from the new read watermark. Returns
+        None when the user is not in the conversation.
+        """
+        values = {"last_delivered_at": func.greatest(ChatParticipant.last_delivered_at, up_to)}
+        if status is MessageDeliveryStatus.READ:
+            read_up_to = func.greatest(ChatParticipant.last_read_at, up_to)
+            values["last_read_at"] = read_up_to
+            values["unread_count"] = (
+                select(func.count())
+                .select_from(ChatMessage)
+                .where(
+                    ChatMessage.conversation_id == conversation_id,
+                    ChatMessage.sender_id != user_id,
+                    ChatMessage.create_at > read_up_to,
+                )
+                .scalar_subquery()
+            )
 
-    async def acknowledge_message(self,
-                                  message_id: uuid.UUID,
-                                  user_id: uuid.UUID,
-                                  status: MessageDeliveryStatus
-                                  ) -> ChatMessage:
         stmt = (
-            select(ChatMessageReceipt)
-            .options(selectinload(ChatMessageReceipt.message).selectinload(ChatMessage.receipts))
+            update(ChatParticipant)
             .where(
-                ChatMessageReceipt.message_id == message_id,
-                ChatMessageReceipt.user_id == user_id,
+                ChatParticipant.conversation_id == conversation_id,
+                ChatParticipant.user_id == user_id,
             )
+            .values(**values)
+            .returning(ChatParticipant)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
         result = await self.db.execute(stmt)
-        receipt = result.scalar_one_or_none()
-        if not receipt:
+        return result.scalar_one_or_none()
+
+
+    async def acknowledge_until(self,
+                                conversation_id: uuid.UUID,
+                                user_id: uuid.UUID,
+                                status: MessageDeliveryStatus,
+                                up_to: datetime
+                                ) -> tuple[ChatParticipant, bool]:
+        """Acknowledge every message up to ``up_to`` with one set-based UPDATE.
+
+        Returns the participant and whether its watermark moved. The
+        acknowledged range is identified by ``up_to`` alone, so no message
+        ids are collected however many messages it covers.
+        """
+        participant = await self.ensure_participant(conversation_id, user_id)
+        previous = (
+            participant.last_read_at
+            if status is MessageDeliveryStatus.READ
+            else participant.last_delivered_at
+        )
+        if previous is not None and previous >= up_to:
+            return participant, False
+
+        await self.advance_watermarks(conversation_id, user_id, status, up_to)
+        return participant, True
+
+
+    async def acknowledge_conversation(self,
+                                       conversation_id: uuid.UUID,
+                                       user_id: uuid.UUID,
+                                       status: MessageDeliveryStatus,
+                                       up_to_message_id: uuid.UUID | None = None
+                                       ) -> tuple[ChatParticipant, ChatAcknowledgement | None]:
+        """Acknowledge up to ``up_to_message_id``, or the latest message.
+
+        The acknowledgement is None when the conversation has no messages.
+        """
+        stmt = select(ChatMessage.id, ChatMessage.create_at).where(ChatMessage.conversation_id == conversation_id)
+        if up_to_message_id is None:
+            stmt = stmt.order_by(ChatMessage.create_at.desc(), ChatMessage.id.desc()).limit(1)
+        else:
+            stmt = stmt.where(ChatMessage.id == up_to_message_id)
+        row = (await self.db.execute(stmt)).first()
+        if row is None:
+            if up_to_message_id is not None:
+                raise MessageNotFound()
+            return await self.ensure_participant(conversation_id, user_id), None
+        participant, advanced = await self.acknowledge_until(conversation_id, user_id, status, row.create_at)
+        return participant, ChatAcknowledgement(up_to=row.create_at, up_to_message_id=row.id, advanced=advanced)
+
+
+    async def acknowledge_message(self,
+                                  message_id: uuid.UUID,
+                                  user_id: uuid.UUID,
+                                  status: MessageDeliveryStatus
+                                  ) -> tuple[ChatMessage, bool]:
+        """Acknowledge someone else's message, and with it every earlier one.
+
+        Returns the message and whether the watermark moved.
+        """
+        result = await self.db.execute(select(ChatMessage).where(ChatMessage.id == message_id))
+        message = result.scalar_one_or_none()
+        if not message or message.sender_id == user_id:
             raise MessageAcknowledgeForbidden()
 
-        now = time_now()
-        if status is MessageDeliveryStatus.DELIVERED:
-            if receipt.delivered_at is None:
-                receipt.delivered_at = now
-        elif status is MessageDeliveryStatus.READ:
-            if receipt.delivered_at is None:
-                receipt.delivered_at = now
-            receipt.read_at = now
-            participant = await self.ensure_participant(
-                receipt.message.conversation_id,
+        try:
+            _, advanced = await self.acknowledge_until(
+                message.conversation_id,
                 user_id,
+                status,
+                message.create_at,
             )
-            if not participant.last_read_at or participant.last_read_at < now:
-                participant.last_read_at = now
-        else:
-            raise MessageNotFound()
+        except ConversationAccessForbidden:
+            raise MessageAcknowledgeForbidden()
+        return message, advanced
 
-        await self.db.flush()
-        await self.db.refresh(receipt.message)
-        return receipt.message
+
+    async def get_unread_counts(self, user_id: uuid.UUID) -> dict[uuid.UUID, int]:
+        stmt = select(ChatParticipant.conversation_id, ChatParticipant.unread_count).where(
+            ChatParticipant.user_id == user_id,
+            ChatParticipant.unread_count > 0,
+        )
+        result = await self.db.execute(stmt)
+        return {conversation_id: count for conversation_id, count in result.all()}
 
 
     async def mark_messages_delivered(self,
-                                      messages: Iterable[ChatMessage],
-                                      recipient_id: uuid.UUID
-                                      ) -> list[uuid.UUID]:
-        now = time_now()
-        updated: list[uuid.UUID] = []
-        for message in messages:
-            for receipt in message.receipts:
-                if receipt.user_id == recipient_id and receipt.delivered_at is None:
-                    receipt.delivered_at = now
-                    updated.append(message.id)
-        if updated:
-            await self.db.flush()
-        return updated
+                                      messages: Sequence[ChatMessage],
+                                      participant: ChatParticipant
+                                      ) -> ChatMessage | None:
+        """Move ``participant``'s delivered watermark past ``messages``.
+
+        Returns the newest of ``messages``, the new watermark, when some of
+        them were not delivered before; otherwise None.
+        """
+        watermark = participant.last_delivered_at
+        if not any(
+            message.sender_id != participant.user_id
+            and (watermark is None or message.create_at > watermark)
+            for message in messages
+        ):
+            return None
+        newest = max(messages, key=lambda message: (message.create_at, message.id))
+        await self.advance_watermarks(
+            participant.conversation_id,
+            participant.user_id,
+            MessageDeliveryStatus.DELIVERED,
+            newest.create_at,
+        )
+        return newest
 
 
     async def load_message(self, message_id: uuid.UUID) -> ChatMessage:
-        stmt = (
-            select(ChatMessage)
-            .options(selectinload(ChatMessage.receipts))
-            .where(ChatMessage.id == message_id)
-        )
-        result = await self.db.execute(stmt)
+        result = await self.db.execute(select(ChatMessage).where(ChatMessage.id == message_id))
         message = result.scalar_one_or_none()
         if not message:
             raise MessageNotFound()
-        return message
\ No newline at end of file
+        return message
+
+
+    async def get_changes(self,
+                          user_id: uuid.UUID,
+                          after_seq: int,
+                          limit: int,
+                          settled_before: datetime
+                          ) -> ChatChanges:
+        """The first ``limit`` changes after ``after_seq`` in the user's conversations.
+
+        Messages and participant rows carry a ``change_seq``; both streams are
+        read in sequence order and merged. Sequence values are drawn before
+        commit, so a change may still become visible behind one already seen:
+        ``next_seq`` never moves past a change written after ``settled_before``,
+        and those changes are sent again by the next call.
+        """
+        my_conversations = (
+            select(ChatParticipant.conversation_id)
+            .where(ChatParticipant.user_id == user_id)
+            .scalar_subquery()
+        )
+        message_result = await self.db.execute(
+            select(ChatMessage)
+            .where(
+                ChatMessage.conversation_id.in_(my_conversations),
+                ChatMessage.change_seq > after_seq,
+            )
+            .order_by(ChatMessage.change_seq)
+            .limit(limit + 1)
+        )
+        participant_result = await self.db.execute(
+            select(ChatParticipant.change_seq, ChatParticipant.updated_at, ChatParticipant.conversation_id)
+            .where(
+                ChatParticipant.conversation_id.in_(my_conversations),
+                ChatParticipant.change_seq > after_seq,
+            )
+            .order_by(ChatParticipant.change_seq)
+            .limit(limit + 1)
+        )
+        # Each stream holds at least its own part of the first ``limit``
+        # changes overall, so cutting the merge at ``limit`` is exact.
+        stream = sorted(
+            [
+                *((message.change_seq, message.updated_at, message) for message in message_result.scalars()),
+                *participant_result.tuples(),
+            ],
+            key=lambda change: change[0],
+        )
+
+        changes = ChatChanges(next_seq=after_seq, has_more=len(stream) > limit)
+        settled = True
+        seen_conversations: set[uuid.UUID] = set()
+        for seq, updated_at, change in stream[:limit]:
+            settled = settled and updated_at < settled_before
+            if settled:
+                changes.next_seq = seq
+            if isinstance(change, ChatMessage):
+                changes.messages.append(change)
+                conversation_id = change.conversation_id
+            else:
+                conversation_id = change
+            if conversation_id not in seen_conversations:
+                seen_conversations.add(conversation_id)
+                changes.conversation_ids.append(conversation_id)
+        # A page the cursor cannot move past is not worth asking for again yet.
+        changes.has_more = changes.has_more and settled
+        return changes
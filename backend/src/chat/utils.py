@@ -3,10 +3,9 @@ from __future__ import annotations
 from pathlib import Path
 from uuid import UUID, uuid4
 
-from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 
-from src.core.config import settings
+from src.core.storage import storage
 
 CHAT_ATTACHMENT_ROOT = "chat_attachments"
 DEFAULT_CONTENT_TYPE = "application/octet-stream"
@@ -23,44 +22,19 @@ async def upload_attachment_to_s3(
     key: str,
     content_type: str | None,
 ) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.head_bucket(Bucket=settings.S3_BUCKET)
-            await client.put_object(
-                Bucket=settings.S3_BUCKET,
-                Key=key,
-                Body=data,
-                ContentType=content_type or DEFAULT_CONTENT_TYPE,
-                ContentDisposition="attachment",
-            )
-            return key
-        except ClientError:
-            return None
-
-
-async def generate_attachment_url(key: str, expires_in: int = 3600) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            url = await client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params={
-                    "Bucket": settings.S3_BUCKET,
-                    "Key": key,
-                },
-                ExpiresIn=expires_in,
-            )
-            return url
-        except ClientError:
-            return None
\ No newline at end of file
+    try:
+        await storage.put_object(
+            key,
+            data,
+            content_type or DEFAULT_CONTENT_TYPE,
+            ContentDisposition="attachment",
+        )
+        return key
+    except ClientError:
+        return None
+
+
+def generate_attachment_url(key: str | None, expires_in: int = 3600) -> str | None:
+    if not key:
+        return None
+    return storage.generate_presigned_url(key, expires_in)
\ No newline at end of file
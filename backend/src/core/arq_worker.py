@@ -2,6 +2,7 @@ from arq import cron
 from arq.connections import RedisSettings
 
 from src.auth.utils import send_reset_email
+from src.chat.partitions import maintain_chat_message_partitions
 from src.core.config import settings
 
 
@@ -10,6 +11,10 @@ class WorkerSettings:
         send_reset_email,
     }
 
+    cron_jobs = [
+        cron(maintain_chat_message_partitions, hour={3}, minute={15}, run_at_startup=True),
+    ]
+
     redis_settings = RedisSettings(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries also expire after a time-to-live.
+
+    Not thread-safe; meant to be used from a single event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key) is not None  # type: ignore[arg-type]
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -66,6 +66,10 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str
     S3_BUCKET: str
+    S3_ENDPOINT_URL: str | None = None
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    S3_PRESIGN_WINDOW_SECONDS: int = 300
+    S3_PRESIGN_CACHE_SIZE: int = 4096
 
     # ─────────────── Chat settings ───────────────
     CHAT_ATTACHMENT_MAX_BYTES: int = 10 * 1024 * 1024
@@ -77,8 +81,47 @@ class Settings(BaseSettings):
         "application/msword",
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
     ]
+    CHAT_BANNED_TERMS_PATH: str = str(Path(__file__).resolve().parents[2] / "data" / "chat_banned_terms.txt")
+    CHAT_BANNED_TERMS_RELOAD_SECONDS: int = 30  # 0 loads the list once
     CHAT_RATE_LIMIT_MAX_EVENTS: int = 30
     CHAT_RATE_LIMIT_WINDOW_SECONDS: int = 10
+    CHAT_BACKPLANE: str = "redis"  # "redis" | "memory" (single process only)
+    CHAT_PRESENCE_HEARTBEAT_SECONDS: int = 15
+    CHAT_PRESENCE_TTL_SECONDS: int = 45
+    CHAT_PRESENCE_GRACE_SECONDS: int = 5  # keep below CHAT_PRESENCE_TTL_SECONDS
+    CHAT_PRESENCE_FLUSH_SECONDS: float = 1.0
+    CHAT_CONTACT_CACHE_SIZE: int = 10_000
+    CHAT_CONTACT_CACHE_TTL_SECONDS: int = 300
+    CHAT_SEND_QUEUE_SIZE: int = 256
+    CHAT_SLOW_CONSUMER_POLICY: str = "disconnect"  # "disconnect" | "drop"
+    # App-level ping/pong for sockets with the "heartbeat" capability; dead
+    # peers are otherwise found by uvicorn's --ws-ping-interval/--ws-ping-timeout.
+    CHAT_WS_PING_INTERVAL_SECONDS: int = 20
+    CHAT_WS_IDLE_TIMEOUT_SECONDS: int = 60  # no frame from a heartbeat client for this long closes the socket
+    CHAT_WS_BATCH_WINDOW_MS: int = 20  # sockets with the "batch" capability only
+    CHAT_WS_BATCH_MAX_EVENTS: int = 100
+    CHAT_LAST_SEEN_CACHE_SIZE: int = 10_000  # memory backplane only
+    CHAT_LAST_SEEN_RETENTION_SECONDS: int = 7 * 24 * 3600
+    CHAT_LAST_SEEN_FLUSH_SECONDS: int = 30  # 0 disables persisting to User.last_seen_at
+    CHAT_MEMBERSHIP_CACHE_SIZE: int = 10_000
+    CHAT_MEMBERSHIP_CACHE_TTL_SECONDS: int = 60
+    CHAT_SYNC_MAX_CHANGES: int = 500
+    CHAT_SYNC_SETTLE_SECONDS: int = 5  # changes younger than this are re-sent on the next sync
+    CHAT_MESSAGE_PARTITIONS_AHEAD: int = 3  # monthly chat_messages partitions created in advance
+    CHAT_MESSAGE_RETENTION_MONTHS: int = 0  # older months are archived to S3_BUCKET; 0 keeps everything online
+
+    # ─────────────── Rate limiting ───────────────
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" | "memory" (per process)
+    RATE_LIMIT_MEMORY_SHARDS: int = 64
+    # Proxies in front of the app that append to X-Forwarded-For; set to 1 in
+    # the Railway service variables. 0 keys IP limits on the socket peer address.
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 0
+    LOGIN_RATE_LIMIT_MAX_EVENTS: int = 10
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    REGISTER_RATE_LIMIT_MAX_EVENTS: int = 5
+    REGISTER_RATE_LIMIT_WINDOW_SECONDS: int = 600
+    LEGAL_AI_RATE_LIMIT_MAX_EVENTS: int = 20
+    LEGAL_AI_RATE_LIMIT_WINDOW_SECONDS: int = 60
 
     # ─────────────── Database pool ───────────────
     DATABASE_POOL_SIZE: int = 16
@@ -89,6 +132,7 @@ class Settings(BaseSettings):
     CORS_ORIGIN: list[str] = ["http://localhost:8081"]
     CORS_ORIGIN_REGEX: str | None = None
     CORS_HEADERS: list[str] = ["*"]
+    CORS_EXPOSE_HEADERS: list[str] = ["X-Next-Cursor", "X-Prev-Cursor"]
 
     # ─────────────── JWT ───────────────
     JWT_ALGORITHM: str = "HS256"
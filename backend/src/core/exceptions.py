@@ -1,3 +1,4 @@
+import math
 from typing import Any
 from fastapi import HTTPException, status
 
@@ -40,4 +41,19 @@ class NotFoundException(HTTPException):
         super().__init__(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Not Found."
-        )
\ No newline at end of file
+        )
+
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+
+class TooManyRequests(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please try again later.",
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))}
+        )
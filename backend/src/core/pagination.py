@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from src.core.exceptions import InvalidCursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor string."""
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Unpack a cursor produced by ``encode_cursor`` holding ``size`` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor()
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor()
+    return values
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+from src.core.cache import TTLCache
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+SERVICE = "s3"
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+class S3Presigner:
+    """Signs SigV4 query-string GET URLs locally, without an S3 client.
+
+    Signing timestamps are aligned to a fixed window, so every request for the
+    same key inside one window produces the same URL and can be served from
+    the cache. A URL handed out late in a window is still valid for at least
+    ``expires_in - window`` seconds.
+    """
+
+    def __init__(self,
+                 *,
+                 access_key: str,
+                 secret_key: str,
+                 region: str,
+                 bucket: str,
+                 endpoint_url: str | None = None,
+                 window_seconds: int = 300,
+                 cache_size: int = 4096
+                 ) -> None:
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._region = region
+        self._window = window_seconds
+        self._cache: TTLCache[tuple[str, int, int], str] = TTLCache(cache_size, window_seconds)
+        self._signing_keys: dict[str, bytes] = {}
+
+        if endpoint_url:
+            parts = urlsplit(endpoint_url)
+            self._origin = f"{parts.scheme}://{parts.netloc}"
+            self._host = parts.netloc
+            self._path_prefix = f"/{bucket}"
+        else:
+            self._host = f"{bucket}.s3.{region}.amazonaws.com"
+            self._origin = f"https://{self._host}"
+            self._path_prefix = ""
+
+
+    def presign_get(self, key: str, expires_in: int = 3600) -> str:
+        now = time.time()
+        window = max(1, min(self._window, expires_in // 2))
+        slot = int(now // window)
+        cache_key = (key, expires_in, slot)
+
+        url = self._cache.get(cache_key)
+        if url is None:
+            url = self._sign(key, expires_in, slot * window)
+            self._cache.set(cache_key, url, ttl=(slot + 1) * window - now)
+        return url
+
+
+    def _signing_key(self, datestamp: str) -> bytes:
+        signing_key = self._signing_keys.get(datestamp)
+        if signing_key is None:
+            signing_key = _hmac(f"AWS4{self._secret_key}".encode("utf-8"), datestamp)
+            for part in (self._region, SERVICE, "aws4_request"):
+                signing_key = _hmac(signing_key, part)
+            self._signing_keys = {datestamp: signing_key}
+        return signing_key
+
+
+    def _sign(self, key: str, expires_in: int, signed_at: int) -> str:
+        amz_date = datetime.fromtimestamp(signed_at, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/{self._region}/{SERVICE}/aws4_request"
+
+        path = quote(f"{self._path_prefix}/{key}", safe="/~")
+        query = "&".join(
+            f"{name}={quote(value, safe='-_.~')}"
+            for name, value in sorted(
+                {
+                    "X-Amz-Algorithm": ALGORITHM,
+                    "X-Amz-Credential": f"{self._access_key}/{scope}",
+                    "X-Amz-Date": amz_date,
+                    "X-Amz-Expires": str(expires_in),
+                    "X-Amz-SignedHeaders": "host",
+                }.items()
+            )
+        )
+        canonical_request = "\n".join(
+            ("GET", path, query, f"host:{self._host}", "", "host", "UNSIGNED-PAYLOAD")
+        )
+        string_to_sign = "\n".join(
+            (
+                ALGORITHM,
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            )
+        )
+        signature = hmac.new(
+            self._signing_key(datestamp),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+        return f"{self._origin}{path}?{query}&X-Amz-Signature={signature}"
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Awaitable, Callable
+
+from fastapi import Depends, Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.exceptions import TooManyRequests
+from src.core.redis import get_redis
+
+logger = logging.getLogger("rate_limit")
+
+
+class RateLimiter(ABC):
+    """Sliding-window limiter keyed by arbitrary strings.
+
+    ``acquire`` records one event and returns 0 when it fits in the window,
+    otherwise it records nothing and returns the seconds until a slot frees.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, max_events: int, window_seconds: int) -> float: ...
+
+
+    @abstractmethod
+    async def reset(self, key: str) -> None: ...
+
+
+class _Shard:
+    __slots__ = ("lock", "events", "expires_at", "operations")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.events: dict[str, deque[float]] = {}
+        self.expires_at: dict[str, float] = {}
+        self.operations = 0
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Per-process limiter; keys are spread over independently locked shards.
+
+    Idle keys are swept every ``sweep_every`` operations on their shard, so
+    memory is bounded by the users active within one window.
+    """
+
+    def __init__(self, shards: int = 64, sweep_every: int = 256) -> None:
+        self._shards = [_Shard() for _ in range(shards)]
+        self._sweep_every = sweep_every
+
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+
+
+    async def acquire(self, key: str, max_events: int, window_seconds: int) -> float:
+        now = time.monotonic()
+        shard = self._shard(key)
+        async with shard.lock:
+            shard.operations += 1
+            if shard.operations % self._sweep_every == 0:
+                self._sweep(shard, now)
+
+            events = shard.events.get(key)
+            if events is None:
+                events = shard.events[key] = deque()
+            cutoff = now - window_seconds
+            while events and events[0] <= cutoff:
+                events.popleft()
+
+            if len(events) >= max_events:
+                return max(events[0] + window_seconds - now, 0.001)
+
+            events.append(now)
+            shard.expires_at[key] = now + window_seconds
+            return 0
+
+
+    @staticmethod
+    def _sweep(shard: _Shard, now: float) -> None:
+        expired = [key for key, expires_at in shard.expires_at.items() if expires_at <= now]
+        for key in expired:
+            shard.expires_at.pop(key, None)
+            shard.events.pop(key, None)
+
+
+    async def reset(self, key: str) -> None:
+        shard = self._shard(key)
+        async with shard.lock:
+            shard.events.pop(key, None)
+            shard.expires_at.pop(key, None)
+
+
+    def __len__(self) -> int:
+        return sum(len(shard.events) for shard in self._shards)
+
+
+class RedisRateLimiter(RateLimiter):
+    """Cluster-wide limiter: one sorted set per key, trimmed atomically in Lua.
+
+    Timestamps come from the Redis clock so every node agrees on the window,
+    and each key expires one window after its last event. If Redis is
+    unreachable the in-memory ``fallback`` keeps limiting per process.
+    """
+
+    KEY_PREFIX = "rate_limit:"
+
+    # KEYS: events. ARGV: max_events, window_ms, member. Returns retry-after ms.
+    _ACQUIRE_SCRIPT = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    local window = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        return math.max(tonumber(oldest[2]) + window - now, 1)
+    end
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+    """
+
+    def __init__(self, redis: Redis, fallback: RateLimiter | None = None) -> None:
+        self._redis = redis
+        self._acquire = redis.register_script(self._ACQUIRE_SCRIPT)
+        self._fallback = fallback or InMemoryRateLimiter()
+
+
+    async def acquire(self, key: str, max_events: int, window_seconds: int) -> float:
+        try:
+            retry_after_ms = await self._acquire(
+                keys=[self.KEY_PREFIX + key],
+                args=[max_events, window_seconds * 1000, uuid.uuid4().hex],
+            )
+        except RedisError as exc:
+            logger.warning("rate_limit.redis_unavailable", extra={"error": str(exc)})
+            return await self._fallback.acquire(key, max_events, window_seconds)
+        return int(retry_after_ms) / 1000
+
+
+    async def reset(self, key: str) -> None:
+        try:
+            await self._redis.delete(self.KEY_PREFIX + key)
+        except RedisError as exc:
+            logger.warning("rate_limit.redis_unavailable", extra={"error": str(exc)})
+        await self._fallback.reset(key)
+
+
+def create_rate_limiter() -> RateLimiter:
+    local = InMemoryRateLimiter(shards=settings.RATE_LIMIT_MEMORY_SHARDS)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return local
+    return RedisRateLimiter(get_redis(), fallback=local)
+
+
+rate_limiter = create_rate_limiter()
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address as seen by the outermost trusted proxy.
+
+    Each of the ``RATE_LIMIT_TRUSTED_PROXY_HOPS`` proxies in front of the app
+    appends the address it got the request from to ``X-Forwarded-For``, so
+    the client is that many entries from the right. Entries further left come
+    from the client itself and are ignored.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            host.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for host in header.split(",")
+            if host.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str,
+               max_events: int,
+               window_seconds: int,
+               *,
+               key: Callable[..., str | Awaitable[str]] = client_ip
+               ) -> Callable[..., Awaitable[None]]:
+    """FastAPI dependency limiting ``scope`` per identity returned by ``key``.
+
+    ``key`` is itself resolved as a dependency (client IP by default), so it
+    can depend on the current user or anything else FastAPI can inject.
+    """
+
+    async def dependency(identity: str = Depends(key)) -> None:
+        retry_after = await rate_limiter.acquire(f"{scope}:{identity}", max_events, window_seconds)
+        if retry_after:
+            raise TooManyRequests(retry_after)
+
+    return dependency
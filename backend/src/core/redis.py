@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from redis.asyncio import Redis
+
+from src.core.config import settings
+
+_client: Redis | None = None
+
+
+def create_redis_client(**kwargs) -> Redis:
+    """Build a redis.asyncio client from the same settings the arq pool uses."""
+    if settings.REDIS_URL:
+        return Redis.from_url(settings.REDIS_URL, **kwargs)
+    return Redis(
+        host=settings.REDIS_HOST or "localhost",
+        port=settings.REDIS_PORT or 6379,
+        username="default",
+        password=settings.REDIS_PASSWORD,
+        db=0,
+        **kwargs,
+    )
+
+
+def get_redis() -> Redis:
+    """Process-wide client for commands; connections are opened lazily."""
+    global _client
+    if _client is None:
+        _client = create_redis_client(decode_responses=True)
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import AsyncExitStack
+from typing import IO, Any
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+
+from src.core.config import settings
+from src.core.presigner import S3Presigner
+
+
+class S3Storage:
+    """Process-wide S3 client shared by every storage helper.
+
+    The client (and its connection pool) is opened once by the application
+    lifespan and reused by all routers, so uploads, deletes and presigns no
+    longer pay for a new client and TLS handshake on every call. Helpers that
+    run outside the lifespan (scripts, workers) start it lazily on first use.
+    Presigned GET URLs are signed locally and never touch the client.
+    """
+
+    def __init__(self) -> None:
+        self._client: Any | None = None
+        self._exit_stack: AsyncExitStack | None = None
+        self._lock = asyncio.Lock()
+        self._presigner = S3Presigner(
+            access_key=settings.AWS_ACCESS_KEY,
+            secret_key=settings.AWS_SECRET_ACCESS_KEY,
+            region=settings.AWS_REGION,
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            window_seconds=settings.S3_PRESIGN_WINDOW_SECONDS,
+            cache_size=settings.S3_PRESIGN_CACHE_SIZE,
+        )
+
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._client is not None:
+                return
+
+            exit_stack = AsyncExitStack()
+            session = get_session()
+            self._client = await exit_stack.enter_async_context(
+                session.create_client(
+                    "s3",
+                    region_name=settings.AWS_REGION,
+                    endpoint_url=settings.S3_ENDPOINT_URL,
+                    aws_access_key_id=settings.AWS_ACCESS_KEY,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    config=AioConfig(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
+                )
+            )
+            self._exit_stack = exit_stack
+
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+            self._client = None
+            self._exit_stack = None
+
+
+    async def _get_client(self) -> Any:
+        if self._client is None:
+            await self.start()
+        return self._client
+
+
+    async def put_object(self, key: str, body: bytes | IO[bytes], content_type: str, **extra: Any) -> None:
+        client = await self._get_client()
+        await client.put_object(
+            Bucket=settings.S3_BUCKET,
+            Key=key,
+            Body=body,
+            ContentType=content_type,
+            **extra,
+        )
+
+
+    async def delete_object(self, key: str) -> None:
+        client = await self._get_client()
+        await client.delete_object(Bucket=settings.S3_BUCKET, Key=key)
+
+
+    def generate_presigned_url(self, key: str, expires_in: int = 3600) -> str:
+        return self._presigner.presign_get(key, expires_in)
+
+
+storage = S3Storage()
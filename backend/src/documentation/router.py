@@ -41,8 +41,8 @@ async def _ensure_admin(user: User) -> None:
         raise DocumentationForbidden()
 
 
-async def _build_response(document: LawDocumentation) -> DocumentationResponse:
-    file_url = await generate_document_url(document.s3_key)
+def _build_response(document: LawDocumentation) -> DocumentationResponse:
+    file_url = generate_document_url(document.s3_key)
     return DocumentationResponse(
         id=document.id,
         display_name=document.display_name,
@@ -97,7 +97,7 @@ async def upload_documentation(
         raise
 
     await db.refresh(record)
-    return await _build_response(record)
+    return _build_response(record)
 
 
 @documentation_route.get("/",
@@ -107,7 +107,7 @@ async def list_documentation(db: SessionDep) -> List[DocumentationResponse]:
     documents = result.scalars().all()
     responses: List[DocumentationResponse] = []
     for document in documents:
-        responses.append(await _build_response(document))
+        responses.append(_build_response(document))
     return responses
 
 
@@ -117,7 +117,7 @@ async def get_documentation(document_id: str, db: SessionDep) -> DocumentationRe
     document = await db.get(LawDocumentation, document_id)
     if not document:
         raise DocumentationNotFound()
-    return await _build_response(document)
+    return _build_response(document)
 
 
 @documentation_route.patch("/{document_id}",
@@ -173,7 +173,7 @@ async def update_documentation(
             raise
 
     await db.refresh(record)
-    return await _build_response(record)
+    return _build_response(record)
 
 
 @documentation_route.delete("/{document_id}")
@@ -3,10 +3,9 @@ from __future__ import annotations
 from pathlib import Path
 from uuid import uuid4
 
-from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 
-from src.core.config import settings
+from src.core.storage import storage
 
 
 DOCUMENTATION_ROOT = "law_documentation"
@@ -21,54 +20,22 @@ def build_document_key(display_name: str, original_filename: str | None) -> str:
 
 
 async def upload_to_s3(file_bytes: bytes, key: str, content_type: str) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.head_bucket(Bucket=settings.S3_BUCKET)
-            await client.put_object(
-                Bucket=settings.S3_BUCKET,
-                Key=key,
-                Body=file_bytes,
-                ContentType=content_type,
-            )
-            return key
-        except ClientError:
-            return None
+    try:
+        await storage.put_object(key, file_bytes, content_type)
+        return key
+    except ClientError:
+        return None
 
 
 async def delete_from_s3(key: str) -> bool:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.delete_object(Bucket=settings.S3_BUCKET, Key=key)
-            return True
-        except ClientError:
-            return False
+    try:
+        await storage.delete_object(key)
+        return True
+    except ClientError:
+        return False
 
 
-async def generate_document_url(key: str, expires_in: int = 3600) -> str | None:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            return await client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params={"Bucket": settings.S3_BUCKET, "Key": key},
-                ExpiresIn=expires_in,
-            )
-        except ClientError:
-            return None
\ No newline at end of file
+def generate_document_url(key: str | None, expires_in: int = 3600) -> str | None:
+    if not key:
+        return None
+    return storage.generate_presigned_url(key, expires_in)
\ No newline at end of file
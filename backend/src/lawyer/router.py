@@ -2,6 +2,7 @@ from __future__ import annotations
 import asyncio
 
 from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
 from typing import Iterable
 from uuid import UUID
 
@@ -11,13 +12,17 @@ from fastapi import (
     File,
     Form,
     Query,
+    Response,
     UploadFile,
     status,
 )
-from sqlalchemy import select
+from sqlalchemy import Numeric, cast, func, select, tuple_
 
 from src.auth.dependencies import get_current_user
+from src.booking.models import LawyerRatingSummary
 from src.core.database import SessionDep
+from src.core.exceptions import InvalidCursor
+from src.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from src.lawyer.constants import (
     LawyerVerificationStatus,
     MAX_JOB_POSITION_LENGTH,
@@ -81,18 +86,11 @@ lawyer_route = APIRouter(
 )
 
 
-async def _generate_document_urls(request: LawyerVerificationRequest) -> dict[str, str]:
-
-    tasks = {
-        column: asyncio.create_task(
-            generate_presigned_url(getattr(request, column))
-        )
-        for column in DOCUMENT_COLUMN_NAMES
-    }
+def _generate_document_urls(request: LawyerVerificationRequest) -> dict[str, str]:
 
     results: dict[str, str] = {}
-    for column, task in tasks.items():
-        url = await task
+    for column in DOCUMENT_COLUMN_NAMES:
+        url = generate_presigned_url(getattr(request, column))
         if not url:
             raise RequestDocumentUnavailable()
         results[column] = url
@@ -116,10 +114,10 @@ def _build_summary_response(request: LawyerVerificationRequest, user: User) -> R
     )
 
 
-async def _build_detail_response(request: LawyerVerificationRequest, user: User) -> RequestDetailResponse:
+def _build_detail_response(request: LawyerVerificationRequest, user: User) -> RequestDetailResponse:
 
     summary = _build_summary_response(request, user)
-    document_urls = await _generate_document_urls(request)
+    document_urls = _generate_document_urls(request)
 
     return RequestDetailResponse(
         **summary.model_dump(), 
@@ -139,12 +137,10 @@ def _ensure_admin(user: User) -> None:
         raise RequestForbidden()
 
 
-async def _build_profile_response(db: SessionDep,
-                                  profile: LawyerProfile, 
-                                  user: User
-                                  ) -> LawyerProfileResponse:
-    
-    rating = await calculate_lawyer_rating(db, profile.user_id)
+def _serialize_profile(profile: LawyerProfile,
+                       user: User,
+                       rating: float | None
+                       ) -> LawyerProfileResponse:
 
     return LawyerProfileResponse(
         id = profile.id,
@@ -164,6 +160,15 @@ async def _build_profile_response(db: SessionDep,
     )
 
 
+async def _build_profile_response(db: SessionDep,
+                                  profile: LawyerProfile, 
+                                  user: User
+                                  ) -> LawyerProfileResponse:
+    
+    rating = await calculate_lawyer_rating(db, profile.user_id)
+    return _serialize_profile(profile, user, rating)
+
+
 async def _get_lawyer_profile(
     db: SessionDep,
     user_id: UUID,
@@ -264,7 +269,7 @@ async def create_lawyer_verification_request(db: SessionDep,
 
     await db.refresh(new_request)
 
-    return await _build_detail_response(new_request, current_user)
+    return _build_detail_response(new_request, current_user)
 
 
 @lawyer_route.get("/verification-requests/me",
@@ -337,7 +342,7 @@ async def get_lawyer_verification_request(request_id: UUID,
     if not user:
         raise RequestNotFound()
 
-    return await _build_detail_response(request, user)
+    return _build_detail_response(request, user)
 
 
 
@@ -388,7 +393,7 @@ async def approve_lawyer_verification_request(request_id: UUID,
     if not user:
         raise RequestNotFound()
 
-    return await _build_detail_response(request, user)
+    return _build_detail_response(request, user)
 
 
 @lawyer_route.patch("/verification-requests/{request_id}/reject",
@@ -420,7 +425,7 @@ async def reject_lawyer_verification_request(request_id: UUID,
     if not user:
         raise RequestNotFound()
 
-    return await _build_detail_response(request, user)
+    return _build_detail_response(request, user)
 
 
 @lawyer_route.post("/lawyers/{lawyer_id}/revoke",
@@ -506,29 +511,60 @@ async def revoke_lawyer_role(lawyer_id: UUID,
 @lawyer_route.get("/profile",
                   response_model=list[LawyerProfileResponse])
 async def list_lawyer_profiles(db: SessionDep,
+                               response: Response,
+                               limit: int | None = Query(default=None, ge=1, le=100),
+                               cursor: str | None = Query(default=None),
                                ) -> list[LawyerProfileResponse]:
 
-    result = await db.execute(
-        select(LawyerProfile, User)
+    # Without ``limit`` every profile is returned, as before paging existed;
+    # with it, ``X-Next-Cursor`` is set while more profiles follow.
+    # Rated lawyers first (best rating first), then by name. Every sort key
+    # ascends so the keyset predicate is a single row comparison.
+    average_rating = func.round(
+        cast(LawyerRatingSummary.rating_sum, Numeric)
+        / func.nullif(LawyerRatingSummary.rating_count, 0),
+        2,
+    )
+    sort_key = (
+        average_rating.is_(None),
+        -func.coalesce(average_rating, 0),
+        func.lower(LawyerProfile.display_name),
+        LawyerProfile.id,
+    )
+
+    stmt = (
+        select(LawyerProfile, User, average_rating, *sort_key)
         .join(User, LawyerProfile.user_id == User.id)
+        .outerjoin(LawyerRatingSummary, LawyerRatingSummary.lawyer_id == LawyerProfile.user_id)
         .where(User.role == UserRole.LAWYER.value)
+        .order_by(*sort_key)
     )
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    if cursor:
+        unrated, negated_rating, name_key, profile_id = decode_cursor(cursor, 4)
+        try:
+            after = (bool(unrated), Decimal(negated_rating), str(name_key), UUID(profile_id))
+        except (InvalidOperation, TypeError, ValueError):
+            raise InvalidCursor()
+        stmt = stmt.where(tuple_(*sort_key) > tuple_(*after))
 
+    result = await db.execute(stmt)
     records = result.all()
 
-    profiles: list[LawyerProfileResponse] = []
-    for profile, user in records:
-        profiles.append(await _build_profile_response(db, profile, user))
+    if limit is not None and len(records) > limit:
+        records = records[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*records[-1][3:])
 
-    profiles.sort(
-        key=lambda item: (
-            item.average_rating is None,
-            -(item.average_rating or 0),
-            item.display_name.lower(),
+    return [
+        _serialize_profile(
+            profile,
+            user,
+            float(rating) if rating is not None else None,
         )
-    )
-
-    return profiles
+        for profile, user, rating, *_ in records
+    ]
 
 
 @lawyer_route.get("/profile/{lawyer_id}",
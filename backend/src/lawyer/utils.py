@@ -4,10 +4,9 @@ from pathlib import Path
 from typing import Optional
 from uuid import UUID, uuid4
 
-from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 
-from src.core.config import settings
+from src.core.storage import storage
 
 
 DOCUMENT_ROOT_FOLDER = "lawyer_verifications"
@@ -28,61 +27,24 @@ def build_verification_document_key(user_id: UUID,
 
 
 async def upload_file_to_s3(file_obj: bytes, s3_key: str, content_type: str) -> Optional[str]:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.head_bucket(Bucket=settings.S3_BUCKET)
-            await client.put_object(
-                Bucket=settings.S3_BUCKET,
-                Key=s3_key,
-                Body=file_obj,
-                ContentType=content_type or DEFAULT_CONTENT_TYPE,
-            )
-            return s3_key
-        except ClientError as exc:
-            print("Upload error: ", {exc})
-            return None
+    try:
+        await storage.put_object(s3_key, file_obj, content_type or DEFAULT_CONTENT_TYPE)
+        return s3_key
+    except ClientError as exc:
+        print("Upload error: ", {exc})
+        return None
 
 
 async def delete_file_from_s3(s3_key: str) -> bool:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.delete_object(Bucket=settings.S3_BUCKET, Key=s3_key)
-            return True
-        except ClientError as exc:
-            print("Delete failed: ", {exc})
-            return False
-
-
-async def generate_presigned_url(filename: str, expires_in: int = 3600) -> Optional[str]:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            url = await client.generate_presigned_url(
-                ClientMethod="get_object",
-                Params={
-                    "Bucket": settings.S3_BUCKET,
-                    "Key": filename,
-                },
-                ExpiresIn=expires_in,
-            )
-            return url
-        except ClientError as exc:
-            print("Generate presigned URL error: ", {exc})
-            return None
\ No newline at end of file
+    try:
+        await storage.delete_object(s3_key)
+        return True
+    except ClientError as exc:
+        print("Delete failed: ", {exc})
+        return False
+
+
+def generate_presigned_url(filename: str | None, expires_in: int = 3600) -> Optional[str]:
+    if not filename:
+        return None
+    return storage.generate_presigned_url(filename, expires_in)
\ No newline at end of file
@@ -4,7 +4,9 @@ import logging
 
 from fastapi import APIRouter, Depends
 
-from src.auth.dependencies import get_current_user
+from src.auth.dependencies import current_user_rate_key, get_current_user
+from src.core.config import settings
+from src.core.rate_limit import rate_limit
 from src.legal_ai.dependencies import get_chatbot_service
 from src.legal_ai.schemas import LegalAIQueryRequest, LegalAIResponse
 from src.legal_ai.service import LegalChatbotService
@@ -18,7 +20,20 @@ legal_ai_route = APIRouter(
 logger = logging.getLogger("legal_ai.api")
 
 
-@legal_ai_route.post("/query", response_model=LegalAIResponse)
+@legal_ai_route.post(
+    "/query",
+    response_model=LegalAIResponse,
+    dependencies=[
+        Depends(
+            rate_limit(
+                "legal_ai:query",
+                settings.LEGAL_AI_RATE_LIMIT_MAX_EVENTS,
+                settings.LEGAL_AI_RATE_LIMIT_WINDOW_SECONDS,
+                key=current_user_rate_key,
+            )
+        )
+    ],
+)
 async def query_legal_ai(payload: LegalAIQueryRequest,
                          current_user: User = Depends(get_current_user),
                          service: LegalChatbotService = Depends(get_chatbot_service)
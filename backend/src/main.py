@@ -7,13 +7,19 @@ from sqlalchemy.future import select
 from starlette.middleware.cors import CORSMiddleware
 
 from src.core.config import settings
-from src.core.database import SessionLocal
+from src.core.database import SessionLocal, engine
+from src.core.redis import close_redis
+from src.core.storage import storage
 from src.auth.router import auth_route
 from src.auth.services import hash_password
 from src.user.constants import UserRole
 from src.user.models import User
 from src.user.router import user_route
 from src.lawyer.router import lawyer_route
+from src.chat.manager import manager
+from src.chat.moderation import banned_terms
+from src.chat.partitions import ensure_message_partitions
+from src.chat.presence import presence
 from src.chat.router import chat_route
 from src.legal_ai.router import legal_ai_route
 from src.documentation.router import documentation_route
@@ -70,6 +76,23 @@ async def lifespan(_app: fastapi.FastAPI):
 
     _app.state.arq_pool = await create_pool(redis_settings)
 
+    # 🗓️ Đảm bảo chat_messages đã có partition cho tháng này và các tháng tới
+    try:
+        async with engine.begin() as connection:
+            await ensure_message_partitions(connection)
+    except Exception as e:
+        print("⚠️ Error creating chat message partitions:", e, flush=True)
+
+    # 🪣 Mở S3 client dùng chung cho toàn bộ router
+    await storage.start()
+
+    # 📡 Nối chat vào backplane (Redis pub/sub) để broadcast giữa các worker
+    await manager.start()
+    await presence.start()
+
+    # 🚫 Danh sách từ cấm của chat, tự nạp lại khi file thay đổi
+    await banned_terms.start()
+
     # 👑 2. Tạo admin mặc định
     await create_admin()
 
@@ -97,6 +120,11 @@ async def lifespan(_app: fastapi.FastAPI):
     try:
         yield
     finally:
+        await banned_terms.stop()
+        await presence.stop()
+        await manager.stop()
+        await storage.close()
+        await close_redis()
         await _app.state.arq_pool.close()
 
 
@@ -111,6 +139,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"),
     allow_headers=settings.CORS_HEADERS,
+    expose_headers=settings.CORS_EXPOSE_HEADERS,
 )
 
 # 📦 Đăng ký router
@@ -9,12 +9,12 @@ from src.chat.models import  (
     ChatConversation,
     ChatParticipant,
     ChatMessage,
-    ChatMessageReceipt,
 )
 from src.documentation.models import LawDocumentation
 from src.booking.models import (
     LawyerScheduleSlot,
     LawyerRating,
+    LawyerRatingSummary,
     BookingRequest,
     CaseHistory
 )
\ No newline at end of file
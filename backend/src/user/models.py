@@ -17,4 +17,6 @@ class User(Base):
     role: Mapped[str] = mapped_column(String(20), nullable=False, default=UserRole.CLIENT.value)
     is_email_verified: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     email_verification_sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    avatar_url: Mapped[str | None] = mapped_column(String(512), nullable=True)
\ No newline at end of file
+    avatar_url: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    # Written in batches by the chat connection manager when sockets close.
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
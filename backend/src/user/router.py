@@ -8,6 +8,7 @@ from arq.connections import RedisSettings
 
 from src.core.database import SessionDep
 from src.core.config import settings
+from src.core.rate_limit import rate_limit
 
 from src.user.models import User
 from src.user.schemas import (
@@ -53,7 +54,11 @@ user_route = APIRouter (
 
 #       REGISTER ROUTE      #
 
-@user_route.post('/register', response_model=UserResponse)
+@user_route.post('/register',
+                 response_model=UserResponse,
+                 dependencies=[Depends(rate_limit("users:register",
+                                                  settings.REGISTER_RATE_LIMIT_MAX_EVENTS,
+                                                  settings.REGISTER_RATE_LIMIT_WINDOW_SECONDS))])
 async def register(user: UserCreate, 
                    db: SessionDep):
     
@@ -5,10 +5,10 @@ from typing import Optional
 from uuid import UUID, uuid4
 from urllib.parse import urlparse
 
-from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 
 from src.core.config import settings
+from src.core.storage import storage
 
 
 AVATAR_ROOT_FOLDER = "user_avatars"
@@ -43,38 +43,18 @@ def extract_key_from_avatar_url(avatar_url: str | None) -> str | None:
 async def upload_avatar_to_s3(file_obj: bytes,
                               s3_key: str,
                               content_type: str | None) -> Optional[str]:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.head_bucket(Bucket=settings.S3_BUCKET)
-            await client.put_object(
-                Bucket=settings.S3_BUCKET,
-                Key=s3_key,
-                Body=file_obj,
-                ContentType=content_type or DEFAULT_CONTENT_TYPE,
-            )
-            return s3_key
-        except ClientError as exc:
-            print("Avatar upload error:", exc)
-            return None
+    try:
+        await storage.put_object(s3_key, file_obj, content_type or DEFAULT_CONTENT_TYPE)
+        return s3_key
+    except ClientError as exc:
+        print("Avatar upload error:", exc)
+        return None
 
 
 async def delete_avatar_from_s3(s3_key: str) -> bool:
-    session = get_session()
-    async with session.create_client(
-        "s3",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    ) as client:
-        try:
-            await client.delete_object(Bucket=settings.S3_BUCKET, Key=s3_key)
-            return True
-        except ClientError as exc:
-            print("Avatar delete error:", exc)
-            return False
\ No newline at end of file
+    try:
+        await storage.delete_object(s3_key)
+        return True
+    except ClientError as exc:
+        print("Avatar delete error:", exc)
+        return False
\ No newline at end of file
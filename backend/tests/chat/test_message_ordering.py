@@ -0,0 +1,82 @@
+"""Message timestamps rise in commit order within a conversation.
+
+Receipt watermarks count every message up to a ``create_at`` as read, so a
+message must never become visible behind one that is already visible.
+"""
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.chat.models import ChatConversation, ChatParticipant
+from src.chat import services
+from src.chat.services import ChatService
+from src.core.base_model import time_now
+from src.user.models import User
+
+
+async def test_late_commit_sorts_after_visible_messages(db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    users = [
+        User(username=f"order_{index}_{suffix}", email=f"order_{index}_{suffix}@example.com", hashed_password="x")
+        for index in range(2)
+    ]
+    db_session.add_all(users)
+    await db_session.flush()
+    conversation = ChatConversation()
+    db_session.add(conversation)
+    await db_session.flush()
+    db_session.add_all([ChatParticipant(conversation_id=conversation.id, user_id=user.id) for user in users])
+    await db_session.flush()
+    service = ChatService(db_session)
+
+    visible = await service.create_message(conversation.id, users[0].id, content="visible")
+    # A sender whose clock was read before ``visible`` was written.
+    stale = time_now() - timedelta(seconds=5)
+    monkeypatch.setattr(services, "time_now", lambda: stale)
+    late = await service.create_message(conversation.id, users[1].id, content="late")
+
+    assert late.create_at > visible.create_at
+
+
+async def test_concurrent_sends_are_stamped_in_commit_order(db_engine: AsyncEngine) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSession(db_engine, expire_on_commit=False) as setup:
+        users = [
+            User(username=f"order_{index}_{suffix}", email=f"order_{index}_{suffix}@example.com", hashed_password="x")
+            for index in range(2)
+        ]
+        setup.add_all(users)
+        await setup.flush()
+        conversation = ChatConversation()
+        setup.add(conversation)
+        await setup.flush()
+        setup.add_all([ChatParticipant(conversation_id=conversation.id, user_id=user.id) for user in users])
+        await setup.commit()
+
+    try:
+        async with (
+            AsyncSession(db_engine, expire_on_commit=False) as first,
+            AsyncSession(db_engine, expire_on_commit=False) as second,
+        ):
+            early = await ChatService(first).create_message(conversation.id, users[0].id, content="first")
+            # Stamped while ``first`` is still open: it has to wait for it.
+            late_send = asyncio.create_task(
+                ChatService(second).create_message(conversation.id, users[1].id, content="second")
+            )
+            await asyncio.sleep(0.3)
+            assert not late_send.done()
+
+            await first.commit()
+            late = await asyncio.wait_for(late_send, timeout=5)
+            await second.commit()
+
+        assert late.create_at > early.create_at
+    finally:
+        async with AsyncSession(db_engine) as cleanup:
+            await cleanup.execute(delete(ChatConversation).where(ChatConversation.id == conversation.id))
+            await cleanup.execute(delete(User).where(User.id.in_([user.id for user in users])))
+            await cleanup.commit()
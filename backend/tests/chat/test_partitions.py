@@ -0,0 +1,51 @@
+"""Rows that land in the default partition are moved into their month."""
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.chat.models import ChatConversation, ChatMessage
+from src.chat.partitions import DEFAULT_PARTITION, ensure_message_partitions, partition_name
+from src.user.models import User
+
+
+async def test_ensure_moves_default_rows_into_their_month(db_session: AsyncSession) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    sender = User(username=f"part_{suffix}", email=f"part_{suffix}@example.com", hashed_password="x")
+    conversation = ChatConversation()
+    db_session.add_all([sender, conversation])
+    await db_session.flush()
+    # Far beyond the months created ahead.
+    month = datetime(2099, 5, 1, tzinfo=timezone.utc)
+    db_session.add_all(
+        [
+            ChatMessage(conversation_id=conversation.id, sender_id=sender.id, content=f"early {index}", create_at=month.replace(day=index + 1))
+            for index in range(3)
+        ]
+    )
+    await db_session.flush()
+
+    async def _placement() -> list[tuple[str, str]]:
+        result = await db_session.execute(
+            text(
+                "SELECT tableoid::regclass::text, content FROM chat_messages "
+                "WHERE conversation_id = :conversation ORDER BY create_at"
+            ),
+            {"conversation": conversation.id},
+        )
+        return [tuple(row) for row in result.all()]
+
+    assert {partition for partition, _ in await _placement()} == {DEFAULT_PARTITION}
+
+    connection = await db_session.connection()
+    created = await ensure_message_partitions(connection, months_ahead=0)
+
+    assert partition_name(month) in created
+    assert await _placement() == [(partition_name(month), f"early {index}") for index in range(3)]
+    # The generated search vector is recomputed for the moved rows.
+    result = await db_session.execute(
+        text("SELECT count(*) FROM chat_messages WHERE conversation_id = :conversation AND search_vector IS NOT NULL"),
+        {"conversation": conversation.id},
+    )
+    assert result.scalar_one() == 3
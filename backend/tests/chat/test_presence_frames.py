@@ -0,0 +1,50 @@
+"""Presence batches only reach sockets that opted into batching."""
+import asyncio
+import json
+import uuid
+
+from src.chat.backplane import InMemoryBackplane, InMemoryBroker
+from src.chat.constants import WebSocketCapability
+from src.chat.manager import PRESENCE_BATCH_EVENT, ConnectionManager
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.frames: list[str] = []
+
+
+    async def send_text(self, text: str) -> None:
+        self.frames.append(text)
+
+
+async def test_presence_batch_is_split_for_sockets_without_batching() -> None:
+    broker = InMemoryBroker()
+    nodes = [
+        ConnectionManager(InMemoryBackplane(broker, ttl_seconds=60), ping_interval=0, last_seen_flush_interval=0, batch_window=0)
+        for _ in range(2)
+    ]
+    for node in nodes:
+        await node.start()
+    recipient = uuid.uuid4()
+    local_plain, remote_plain, remote_batch = _Socket(), _Socket(), _Socket()
+    await nodes[0].connect(recipient, local_plain)
+    await nodes[1].connect(recipient, remote_plain)
+    await nodes[1].connect(recipient, remote_batch, frozenset({WebSocketCapability.BATCH}))
+
+    updates = [
+        {"user_id": str(uuid.uuid4()), "status": "online", "last_seen_at": "2026-10-18T00:00:00+00:00"}
+        for _ in range(2)
+    ]
+    try:
+        await nodes[0].broadcast([recipient], {"type": PRESENCE_BATCH_EVENT, "data": {"updates": updates}})
+        await asyncio.sleep(0.05)
+    finally:
+        for node in nodes:
+            await node.stop()
+
+    singles = [{"type": "presence", "data": update} for update in updates]
+    assert [json.loads(frame) for frame in local_plain.frames] == singles
+    assert [json.loads(frame) for frame in remote_plain.frames] == singles
+    assert [json.loads(frame) for frame in remote_batch.frames] == [
+        [{"type": PRESENCE_BATCH_EVENT, "data": {"updates": updates}}]
+    ]
@@ -0,0 +1,110 @@
+"""Chat lookups, sends and the inbox issue a fixed number of SQL statements.
+
+The counts must not grow with a conversation's message history or with the
+number of conversations in the inbox. When a change legitimately adds or
+removes a statement, update the pinned count here.
+"""
+import uuid
+from datetime import timedelta
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.dependencies import get_current_user
+from src.chat.models import ChatConversation, ChatMessage, ChatParticipant
+from src.chat.services import ChatService
+from src.core.base_model import time_now
+from src.core.database import get_session
+from src.main import app
+from src.user.models import User
+
+SEND_PATH_STATEMENTS = 4
+INBOX_STATEMENTS = 4
+
+
+async def _make_user(session: AsyncSession, label: str) -> User:
+    suffix = uuid.uuid4().hex[:8]
+    user = User(username=f"qc_{label}_{suffix}", email=f"qc_{label}_{suffix}@example.com", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    return user
+
+
+async def _make_conversation(session: AsyncSession, sender: User, recipient: User, history: int) -> uuid.UUID:
+    conversation = ChatConversation(last_message_at=time_now())
+    session.add(conversation)
+    await session.flush()
+    session.add_all(
+        [
+            ChatParticipant(conversation_id=conversation.id, user_id=sender.id),
+            ChatParticipant(conversation_id=conversation.id, user_id=recipient.id),
+        ]
+    )
+    started = time_now() - timedelta(days=1)
+    session.add_all(
+        [
+            ChatMessage(
+                conversation_id=conversation.id,
+                sender_id=sender.id,
+                content=f"history {index}",
+                create_at=started + timedelta(seconds=index),
+            )
+            for index in range(history)
+        ]
+    )
+    await session.flush()
+    return conversation.id
+
+
+async def _send_path_cost(session: AsyncSession, count_statements, conversation_id: uuid.UUID, sender_id: uuid.UUID) -> tuple[int, int]:
+    # Mirrors send_message: lookup, membership check, recipients, insert.
+    session.expunge_all()
+    service = ChatService(session)
+    with count_statements() as counter:
+        # Held so that anything they pulled in stays in the identity map.
+        loaded = [
+            await service.get_conversation(conversation_id),
+            await service.ensure_participant(conversation_id, sender_id),
+        ]
+        await service.get_participant_ids(conversation_id)
+        loaded.append(await service.create_message(conversation_id, sender_id, content="ping"))
+    return counter["statements"], len(session.identity_map)
+
+
+async def _inbox_cost(session: AsyncSession, count_statements, user: User) -> int:
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            with count_statements() as counter:
+                response = await client.get("/chat/conversations")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200, response.text
+    return counter["statements"]
+
+
+@pytest.mark.parametrize("history", [1, 300])
+async def test_send_path_is_independent_of_history(db_session: AsyncSession, count_statements, history: int) -> None:
+    sender = await _make_user(db_session, "sender")
+    recipient = await _make_user(db_session, "recipient")
+    conversation_id = await _make_conversation(db_session, sender, recipient, history)
+
+    statements, loaded = await _send_path_cost(db_session, count_statements, conversation_id, sender.id)
+
+    assert statements == SEND_PATH_STATEMENTS
+    # The conversation, the sender's participant row and the new message;
+    # no history comes along.
+    assert loaded == 3
+
+
+@pytest.mark.parametrize("conversations", [1, 25])
+async def test_inbox_is_independent_of_conversation_count(db_session: AsyncSession, count_statements, conversations: int) -> None:
+    owner = await _make_user(db_session, "owner")
+    for _ in range(conversations):
+        other = await _make_user(db_session, "contact")
+        await _make_conversation(db_session, owner, other, 3)
+    db_session.expunge_all()
+
+    assert await _inbox_cost(db_session, count_statements, owner) == INBOX_STATEMENTS
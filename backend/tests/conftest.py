@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.database import DATABASE_URL
+
+
+@pytest.fixture
+async def db_engine() -> AsyncEngine:
+    # NullPool: every test runs on its own event loop, pooled asyncpg
+    # connections cannot cross loops.
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect():
+            pass
+    except (OSError, DBAPIError) as exc:
+        await engine.dispose()
+        pytest.skip(f"Database unavailable: {exc}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(db_engine: AsyncEngine) -> AsyncSession:
+    """Session inside one transaction that is rolled back after the test.
+
+    Commits made by the code under test only release a savepoint.
+    """
+    async with db_engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+
+
+@pytest.fixture
+def count_statements(db_engine: AsyncEngine):
+    """Context manager counting the SQL statements sent while it is open."""
+
+    @contextmanager
+    def _count():
+        counter = {"statements": 0}
+
+        def _on_execute(*_args, **_kwargs) -> None:
+            counter["statements"] += 1
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", _on_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", _on_execute)
+
+    return _count